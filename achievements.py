@@ -0,0 +1,176 @@
+from collections import namedtuple
+from struct import Struct
+from threading import Lock
+
+import numpy as np
+from sqlalchemy import func, update
+
+from config import db, BADGE_RECOMPUTE_CHUNK_SIZE
+from db import Achievement, User, CourseSkill
+from session_changes import on_commit, changed_any
+
+# Progress of badge slot i is min(100 * metric / goal, 100); the title of slot i is the Achievement with id i + 1
+AchievementRule = namedtuple("AchievementRule", ["role", "metric", "goals", "slots"])
+
+ACHIEVEMENT_RULES = [
+    AchievementRule("STUDENT", "requests_sent", (1, 5, 10, 20), (0, 1, 2, 3)),
+    AchievementRule("STUDENT", "accepted_requests", (1, 3, 10), (4, 5, 6)),
+    AchievementRule("STUDENT", "student_points", (10, 25, 50, 100, 200), (7, 8, 9, 10, 11)),
+    AchievementRule("STUDENT", "sessions_completed_as_student", (1, 5, 10), (12, 13, 14)),
+    AchievementRule("STUDENT", "courses", (1, 3, 5, 10), (15, 16, 17, 18)),
+    AchievementRule("STUDENT", "assignments_taken", (1, 5, 10), (19, 20, 21)),
+    AchievementRule("STUDENT", "tutors_rated", (1, 5, 10), (22, 23, 24)),
+    AchievementRule("STUDENT", "number_of_rates_as_student", (1, 5, 10), (25, 26, 27)),
+    AchievementRule("TUTOR", "requests_accepted", (1, 5, 10, 20), (0, 1, 2, 3)),
+    AchievementRule("TUTOR", "requests_denied", (1, 3, 10), (4, 5, 6)),
+    AchievementRule("TUTOR", "tutor_points", (10, 25, 50, 100, 200), (7, 8, 9, 10, 11)),
+    AchievementRule("TUTOR", "sessions_completed_as_tutor", (1, 5, 10), (12, 13, 14)),
+    AchievementRule("TUTOR", "courses", (1, 3, 5, 10), (15, 16, 17, 18)),
+    AchievementRule("TUTOR", "assignments_created", (1, 5, 10), (19, 20, 21)),
+    AchievementRule("TUTOR", "students_rated", (1, 5, 10), (22, 23, 24)),
+    AchievementRule("TUTOR", "number_of_rates_as_tutor", (1, 5, 10), (25, 26, 27))
+]
+
+PROGRESS_COLUMNS = {"STUDENT": "badge_progress_as_student", "TUTOR": "badge_progress_as_tutor"}
+
+# Progress is stored as 28 little-endian float32 values, 112 bytes per role; responses round off the float32 noise
+PROGRESS_FORMAT = Struct("<28f")
+PROGRESS_DTYPE = np.dtype("<f4")
+
+# Metrics that are not User counters, counted from CourseSkill instead
+DERIVED_METRICS = ("courses",)
+
+
+def encode_progress(progress):
+    return PROGRESS_FORMAT.pack(*progress)
+
+
+def decode_progress(data):
+    return PROGRESS_FORMAT.unpack(data)
+
+
+def quantize_progress(progress):
+    return [*decode_progress(encode_progress(progress))]
+
+
+class AchievementEvaluator:
+    # Rules compiled into (role, metric) -> [(slot, goal)], so a write only touches the slots of the metrics it changed
+    def __init__(self, rules):
+        self.rules = {}
+        for rule in rules:
+            self.rules.setdefault((rule.role, rule.metric), []).extend(zip(rule.slots, rule.goals))
+        self.titles = None
+        self.atlases = {}
+        self.lock = Lock()
+
+    def invalidate(self):
+        with self.lock:
+            self.titles = None
+            self.atlases = {}
+
+    def get_titles(self, role):
+        titles = self.titles
+        if titles is None:
+            with self.lock:
+                if self.titles is None:
+                    self.titles = {}
+                    for x in Achievement.query.all():
+                        self.titles.setdefault(x.role, {})[x.id] = x.title
+                titles = self.titles
+        return titles.get(role, {})
+
+    def get_atlas(self, role, build):
+        # Badge atlases also embed Achievement titles, so they are cached here and dropped along with them
+        atlas = self.atlases.get(role)
+        if atlas is None:
+            with self.lock:
+                atlas = self.atlases.get(role)
+                if atlas is None:
+                    atlas = self.atlases[role] = build(role)
+        return atlas
+
+    def evaluate(self, role, progress, metrics):
+        computed = [*progress]
+        for metric, value in metrics.items():
+            for slot, goal in self.rules[(role, metric)]:
+                computed[slot] = min(100 * (value / goal), 100.0)
+        # Compared as stored, a value float32 rounds up to 100 must unlock here since the next update sees it unchanged
+        computed = quantize_progress(computed)
+        return computed, [x for x, y in enumerate(progress) if y != computed[x] and computed[x] >= 100.0]
+
+    def evaluate_columns(self, role, progress, metrics):
+        # Same as evaluate for a whole chunk of users at once: progress is a (users, slots) float32 array and each
+        # metric an array of one value per user. Computed in float64 and rounded to float32 like evaluate
+        computed = progress.copy()
+        for metric, values in metrics.items():
+            values = np.asarray(values, dtype=np.float64)
+            for slot, goal in self.rules[(role, metric)]:
+                computed[:, slot] = np.minimum(100 * (values / goal), 100.0)
+        return computed
+
+    def update(self, user, role, metrics):
+        # Writes the new progress to the user and returns the titles of the badges it completed
+        column = PROGRESS_COLUMNS[role]
+        computed, completed = self.evaluate(role, decode_progress(getattr(user, column)), metrics)
+        setattr(user, column, encode_progress(computed))
+        titles = self.get_titles(role)
+        return [titles[x + 1] for x in completed]
+
+
+achievements = AchievementEvaluator(ACHIEVEMENT_RULES)
+
+
+def recompute_badge_progress(chunk_size=BADGE_RECOMPUTE_CHUNK_SIZE):
+    # Rebuilds every user's progress from their counters: one read, one grouped count and one executemany per chunk
+    counters = sorted({x.metric for x in ACHIEVEMENT_RULES if x.metric not in DERIVED_METRICS})
+    report = {"usersScanned": 0, "usersChanged": 0, "unlocked": {role: {} for role in PROGRESS_COLUMNS}, "users": []}
+    last_id = 0
+
+    while True:
+        rows = db.session.query(
+            User.id, *[getattr(User, x) for x in PROGRESS_COLUMNS.values()], *[getattr(User, x) for x in counters]
+        ).filter(User.id > last_id).order_by(User.id).limit(chunk_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        ids = [x.id for x in rows]
+        courses = {
+            (user_id, role): count
+            for user_id, role, count in db.session.query(CourseSkill.user_id, CourseSkill.role, func.count())
+            .filter(CourseSkill.user_id.in_(ids)).group_by(CourseSkill.user_id, CourseSkill.role).all()
+        }
+
+        changes = {}
+        for role, column in PROGRESS_COLUMNS.items():
+            metrics = {x: [getattr(row, x) for row in rows] for x in counters if (role, x) in achievements.rules}
+            metrics["courses"] = [courses.get((x, role), 0) for x in ids]
+            current = [getattr(x, column) for x in rows]
+            progress = np.frombuffer(b"".join(current), dtype=PROGRESS_DTYPE).reshape(len(rows), -1)
+            computed = achievements.evaluate_columns(role, progress, metrics)
+            titles = achievements.get_titles(role)
+            # Compared bit for bit, as the stored bytes would be
+            changed = (computed.view(np.uint32) != progress.view(np.uint32)).any(axis=1)
+            completed = (progress < 100.0) & (computed >= 100.0)
+
+            for i in np.flatnonzero(changed):
+                user_id = ids[i]
+                changes.setdefault(user_id, {"id": user_id})[column] = computed[i].tobytes()
+                unlocked = [titles[int(x) + 1] for x in np.flatnonzero(completed[i])]
+                if unlocked:
+                    report["users"].append({"userId": user_id, "role": role, "titles": unlocked})
+                    for title in unlocked:
+                        report["unlocked"][role][title] = report["unlocked"][role].get(title, 0) + 1
+
+        if changes:
+            db.session.execute(update(User), [*changes.values()])
+            # Bulk updates skip the flush events that bump row versions
+            db.session.execute(update(User).where(User.id.in_(changes)).values(row_version=User.row_version + 1))
+        db.session.commit()
+        report["usersScanned"] = report["usersScanned"] + len(rows)
+        report["usersChanged"] = report["usersChanged"] + len(changes)
+
+    return report
+
+
+# Dropped only once the edit is visible, so a concurrent reload cannot keep the old titles
+on_commit("achievement", changed_any(Achievement), lambda changes: achievements.invalidate())
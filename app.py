@@ -1,6 +1,15 @@
-from config import api, db
+import json
+import time
+
+import click
+
+from achievements import recompute_badge_progress
+from availability import check_window
+from config import api, db, PUSH_DISPATCH_SECONDS
+from notifications import dispatch_notifications
+from pagination import check_cursor
 from routes import auth_bp, template_bp, admin_bp, user_bp, assessment_bp, request_bp, session_bp, assignment_bp, \
-    support_bp, admin_auth_bp, admin_assessment_bp
+    support_bp, admin_auth_bp, admin_assessment_bp, image_bp
 from scheduler import init_scheduler
 
 api.register_blueprint(auth_bp, url_prefix="/auth_routes")
@@ -14,8 +23,42 @@ api.register_blueprint(template_bp, url_prefix="/template_routes")
 api.register_blueprint(admin_bp, url_prefix="/admin_routes")
 api.register_blueprint(admin_auth_bp, url_prefix="/admin_auth_routes")
 api.register_blueprint(admin_assessment_bp, url_prefix="/admin_assessment_routes")
+api.register_blueprint(image_bp, url_prefix="/image_routes")
+
+
+api.before_request(check_cursor)
+api.before_request(check_window)
+
+
+@api.before_request
+def start_worker_scheduler():
+    # WSGI servers import the app without running __main__, so each worker starts its scheduler on its first request
+    init_scheduler()
+
+
+@api.cli.command("init-db")
+def init_db():
+    # Migrations start from a baseline that only indexes existing tables, so new databases get their tables here first
+    db.create_all()
+
+
+@api.cli.command("recompute-badges")
+def recompute_badges():
+    click.echo(json.dumps(recompute_badge_progress(), indent=2))
+
+
+@api.cli.command("dispatch-notifications")
+@click.option("--loop", is_flag=True, help="Keep draining the outbox every PUSH_DISPATCH_SECONDS.")
+def dispatch_notifications_command(loop):
+    # For deployments that run their web workers with SCHEDULER_ENABLED=false, nothing else sends queued pushes then
+    while True:
+        click.echo(json.dumps(dispatch_notifications()))
+        if not loop:
+            break
+        time.sleep(PUSH_DISPATCH_SECONDS)
+
 
-# Should be removed in deployment and its corresponding imports
+# Development server, deployments serve app:api from a WSGI server
 if __name__ == '__main__':
 
     with api.app_context():
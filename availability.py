@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import pytz
+from flask import request, jsonify
+
+TIMEZONE = pytz.timezone("Asia/Shanghai")
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def parse_clock(time_str):
+    time = datetime.strptime(time_str, "%I:%M %p")
+    return time.hour * 60 + time.minute
+
+
+@lru_cache(maxsize=4096)
+def parse_free_time(time_str):
+    # "start,end|..." for Monday to Sunday -> merged (start, end) minute-of-week intervals, end exclusive
+    intervals = []
+    for day, time_pair in enumerate(time_str.split("|")):
+        start, end = [parse_clock(x) for x in time_pair.split(",")]
+        # 11:59 PM is the latest time the app lets users pick, it means until midnight
+        if end == MINUTES_PER_DAY - 1:
+            end = MINUTES_PER_DAY
+        if start >= end:
+            continue
+        start, end = day * MINUTES_PER_DAY + start, day * MINUTES_PER_DAY + end
+        if intervals and intervals[-1][1] >= start:
+            intervals[-1] = (intervals[-1][0], max(intervals[-1][1], end))
+        else:
+            intervals.append((start, end))
+    return tuple(intervals)
+
+
+def minute_of_week(date_time):
+    return date_time.weekday() * MINUTES_PER_DAY + date_time.hour * 60 + date_time.minute
+
+
+def window_segments(start, end):
+    # Minute-of-week segments covering [start, end), split where the window wraps past Sunday midnight
+    minutes = min(int((end - start).total_seconds() // 60), MINUTES_PER_WEEK)
+    first = minute_of_week(start)
+    last = first + max(minutes, 1)
+    if last <= MINUTES_PER_WEEK:
+        return ((first, last),)
+    return ((first, MINUTES_PER_WEEK), (0, last - MINUTES_PER_WEEK))
+
+
+def current_window():
+    now = datetime.now(TIMEZONE)
+    return window_segments(now, now)
+
+
+def covers(intervals, segments):
+    return all(any(start <= first and last <= end for start, end in intervals) for first, last in segments)
+
+
+def parse_window_time(value, name):
+    try:
+        return datetime.strptime(value, "%d/%m/%Y %I:%M %p")
+    except ValueError:
+        raise ValueError(f"Invalid {name}, expected DD/MM/YYYY HH:MM AM/PM")
+
+
+def get_window():
+    # Optional availability filter, both times in the "%d/%m/%Y %I:%M %p" format used for sessions
+    available_from = request.args.get("available_from")
+    if not available_from:
+        return None
+    start = parse_window_time(available_from, "available_from")
+    available_to = request.args.get("available_to")
+    end = parse_window_time(available_to, "available_to") if available_to else start + timedelta(minutes=1)
+    if end < start:
+        raise ValueError("available_to is earlier than available_from")
+    return window_segments(start, end)
+
+
+def check_window():
+    # Runs before every route, whose catch-all would otherwise turn a malformed availability filter into a 500
+    try:
+        get_window()
+    except ValueError as e:
+        return jsonify({"error": str(e), "type": "error"}), 400
+    return None
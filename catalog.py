@@ -0,0 +1,73 @@
+import time
+from collections import namedtuple
+from hashlib import sha1
+from threading import Lock
+
+from config import CATALOG_TTL
+from db import Course
+from session_changes import on_commit, changed_any
+
+CatalogCourse = namedtuple("CatalogCourse", ["course_id", "course_name", "course_description", "modules"])
+
+
+class CourseCatalog:
+    # Read-mostly copy of the Course table with modules already split, reloaded whenever the version moves and every
+    # CATALOG_TTL seconds, since courses are edited outside the app where no commit hook sees it
+    def __init__(self):
+        self.version = 0
+        self.loaded_version = -1
+        self.loaded_at = None
+        self.courses = {}
+        self.checksum = None
+        self.lock = Lock()
+
+    def invalidate(self):
+        with self.lock:
+            self.version = self.version + 1
+
+    def is_fresh(self):
+        return self.loaded_version == self.version and time.monotonic() - self.loaded_at <= CATALOG_TTL
+
+    def load(self):
+        if not self.is_fresh():
+            with self.lock:
+                if not self.is_fresh():
+                    version = self.version
+                    courses = {
+                        x.course_id: CatalogCourse(x.course_id, x.course_name, x.course_description, tuple(x.modules.split('|')))
+                        for x in Course.query.order_by(Course.course_id).all()
+                    }
+                    # Same on every worker with the same courses, unlike the version counter
+                    checksum = sha1(repr([*courses.values()]).encode("utf-8")).hexdigest()
+                    # An expiry reload that found other courses moves the version too, so payloads built on them are dropped
+                    if version == self.loaded_version and checksum != self.checksum:
+                        version = self.version = version + 1
+                    self.courses = courses
+                    self.checksum = checksum
+                    self.loaded_version = version
+                    self.loaded_at = time.monotonic()
+        return self.courses
+
+    def get(self, course_id):
+        try:
+            return self.load().get(int(course_id))
+        except (TypeError, ValueError):
+            return None
+
+    def all(self):
+        return [*self.load().values()]
+
+    def get_checksum(self):
+        self.load()
+        return self.checksum
+
+    def get_version(self):
+        self.load()
+        return self.version
+
+
+catalog = CourseCatalog()
+
+
+# Bumped only once the change is visible, so no reload can store pre-commit rows under the new version
+on_commit("catalog", changed_any(Course), lambda changes: catalog.invalidate())
@@ -4,10 +4,13 @@ import firebase_admin
 
 from flask import Flask
 from flask_apscheduler import APScheduler
+from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from firebase_admin import credentials
 from dotenv import load_dotenv
 
+from negotiation import NegotiatingJSONProvider
+
 load_dotenv()
 
 cred = credentials.Certificate("service_account_key.json")
@@ -15,14 +18,45 @@ firebase_admin.initialize_app(cred)
 
 UPLOAD_FOLDER = 'images'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+DEFAULT_IMAGE_PATH = 'images/user.png'
+IMAGE_VARIANTS = {'thumbnail': 128, 'medium': 512}
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CATALOG_TTL = int(os.getenv("CATALOG_TTL", 300))
+TUTOR_INDEX_TTL = int(os.getenv("TUTOR_INDEX_TTL", 300))
+RECOMMENDATION_WINDOW_DAYS = 30
+RECOMMENDATION_SIZE = 20
+LEADERBOARD_TTL = int(os.getenv("LEADERBOARD_TTL", 300))
+LEADERBOARD_SIZE = 20
+QUESTION_BANK_TTL = int(os.getenv("QUESTION_BANK_TTL", 300))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+PRINCIPAL_CACHE_SIZE = 10000
+BADGE_RECOMPUTE_CHUNK_SIZE = 1000
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true") == "true"
+SCHEDULER_LEASE_TTL = 90
+SCHEDULER_HEARTBEAT_SECONDS = 30
+PUSH_TRANSPORT = os.getenv("PUSH_TRANSPORT", "firebase")
+PUSH_BATCH_SIZE = 500
+PUSH_MAX_ATTEMPTS = 5
+PUSH_RETRY_SECONDS = 30
+PUSH_DISPATCH_SECONDS = 5
+MAIL_TRANSPORT = os.getenv("MAIL_TRANSPORT", "smtp")
+MAIL_HOST = os.getenv("MAIL_HOST", "smtp.gmail.com")
+MAIL_PORT = int(os.getenv("MAIL_PORT", 465))
+MAIL_SENDER = os.getenv("MAIL_SENDER", "Brianserrano503@gmail.com")
+MAIL_WORKERS = 2
+MAIL_IDLE_SECONDS = 60
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
 SALT = os.getenv("SALT").encode("utf-8")
 PASSWORD_REGEX = re.compile(os.getenv("PASSWORD_REGEX"))
 EMAIL_REGEX = re.compile(os.getenv("EMAIL_REGEX"))
 PASSWORD = os.getenv("PASSWORD")
 
 api = Flask(__name__, template_folder="templates")
+api.json = NegotiatingJSONProvider(api)
 api.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URI")
 api.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 api.config['SECRET_KEY'] = os.getenv("SECRET_KEY")
 db = SQLAlchemy(api)
+migrate = Migrate(api, db, render_as_batch=True)
 scheduler = APScheduler()
@@ -30,7 +30,7 @@ class User(db.Model):
     accepted_requests = db.Column(db.Integer, nullable=False, default=0)
     assignments_taken = db.Column(db.Integer, nullable=False, default=0)
     assessments_taken_as_student = db.Column(db.Integer, nullable=False, default=0)
-    badge_progress_as_student = db.Column(db.String, nullable=False, default=','.join([*map(lambda x: str(x), [0.0] * 28)]))
+    badge_progress_as_student = db.Column(db.LargeBinary, nullable=False, default=bytes(4 * 28))
     number_of_rates_as_student = db.Column(db.Integer, nullable=False, default=0)
     total_rating_as_student = db.Column(db.Double, nullable=False, default=0.0)
     tutors_rated = db.Column(db.Integer, nullable=False, default=0)
@@ -46,7 +46,7 @@ class User(db.Model):
     requests_received = db.Column(db.Integer, nullable=False, default=0)
     assignments_created = db.Column(db.Integer, nullable=False, default=0)
     assessments_taken_as_tutor = db.Column(db.Integer, nullable=False, default=0)
-    badge_progress_as_tutor = db.Column(db.String, nullable=False, default=','.join([*map(lambda x: str(x), [0.0] * 28)]))
+    badge_progress_as_tutor = db.Column(db.LargeBinary, nullable=False, default=bytes(4 * 28))
     number_of_rates_as_tutor = db.Column(db.Integer, nullable=False, default=0)
     total_rating_as_tutor = db.Column(db.Double, nullable=False, default=0.0)
     students_rated = db.Column(db.Integer, nullable=False, default=0)
@@ -56,6 +56,12 @@ class User(db.Model):
 
     push_notifications_token = db.Column(db.String, nullable=False, default="")
     is_banned = db.Column(db.Boolean, nullable=False, default=False)
+    row_version = db.Column(db.Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        db.Index("ix_user_email", "email"),
+        db.Index("ix_user_name", "name"),
+    )
 
 
 class Message(db.Model):
@@ -69,6 +75,12 @@ class Message(db.Model):
     status = db.Column(db.String, nullable=False, default="WAITING")
     tutor_viewed = db.Column(db.Boolean, nullable=False, default=False)
 
+    __table_args__ = (
+        db.Index("ix_message_student_id_status", "student_id", "status"),
+        db.Index("ix_message_tutor_id_status", "tutor_id", "status"),
+        db.Index("ix_message_expire_date_waiting", "expire_date", sqlite_where=db.text("status = 'WAITING'"), postgresql_where=db.text("status = 'WAITING'")),
+    )
+
 
 class Session(db.Model):
     session_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -85,6 +97,12 @@ class Session(db.Model):
     tutor_rate = db.Column(db.Boolean, nullable=False, default=False)
     student_viewed = db.Column(db.Boolean, nullable=False, default=False)
 
+    __table_args__ = (
+        db.Index("ix_session_student_id_status", "student_id", "status"),
+        db.Index("ix_session_tutor_id_status", "tutor_id", "status"),
+        db.Index("ix_session_expire_date_upcoming", "expire_date", sqlite_where=db.text("status = 'UPCOMING'"), postgresql_where=db.text("status = 'UPCOMING'")),
+    )
+
 
 class CourseSkill(db.Model):
     course_skill_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -94,6 +112,11 @@ class CourseSkill(db.Model):
     assessment_taken = db.Column(db.Integer, nullable=False, default=0)
     assessment_rating = db.Column(db.Double, nullable=False, default=0.0)
 
+    __table_args__ = (
+        db.Index("ix_course_skill_course_id_role", "course_id", "role"),
+        db.Index("ix_course_skill_user_id_role", "user_id", "role"),
+    )
+
 
 class Assignment(db.Model):
     assignment_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -108,6 +131,12 @@ class Assignment(db.Model):
     status = db.Column(db.String, nullable=False, default="UNCOMPLETED")
     student_viewed = db.Column(db.Boolean, nullable=False, default=False)
 
+    __table_args__ = (
+        db.Index("ix_assignment_student_id_status", "student_id", "status"),
+        db.Index("ix_assignment_tutor_id_status", "tutor_id", "status"),
+        db.Index("ix_assignment_dead_line_uncompleted", "dead_line", sqlite_where=db.text("status = 'UNCOMPLETED'"), postgresql_where=db.text("status = 'UNCOMPLETED'")),
+    )
+
 
 class Course(db.Model):
     course_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -177,6 +206,10 @@ class PendingMultipleChoiceAssessment(db.Model):
     creator = db.Column(db.String, nullable=False)
     status = db.Column(db.String, nullable=False, default="PENDING")
 
+    __table_args__ = (
+        db.Index("ix_pending_multiple_choice_assessment_pending", "assessment_id", sqlite_where=db.text("status = 'PENDING'"), postgresql_where=db.text("status = 'PENDING'")),
+    )
+
 
 class PendingIdentificationAssessment(db.Model):
     assessment_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -187,6 +220,10 @@ class PendingIdentificationAssessment(db.Model):
     creator = db.Column(db.String, nullable=False)
     status = db.Column(db.String, nullable=False, default="PENDING")
 
+    __table_args__ = (
+        db.Index("ix_pending_identification_assessment_pending", "assessment_id", sqlite_where=db.text("status = 'PENDING'"), postgresql_where=db.text("status = 'PENDING'")),
+    )
+
 
 class PendingTrueOrFalseAssessment(db.Model):
     assessment_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -197,6 +234,10 @@ class PendingTrueOrFalseAssessment(db.Model):
     creator = db.Column(db.String, nullable=False)
     status = db.Column(db.String, nullable=False, default="PENDING")
 
+    __table_args__ = (
+        db.Index("ix_pending_true_or_false_assessment_pending", "assessment_id", sqlite_where=db.text("status = 'PENDING'"), postgresql_where=db.text("status = 'PENDING'")),
+    )
+
 
 class SupportChat(db.Model):
     chat_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -206,9 +247,51 @@ class SupportChat(db.Model):
     date = db.Column(db.DateTime, nullable=False, default=datetime.now())
     is_closed = db.Column(db.Boolean, nullable=False, default=False)
 
+    __table_args__ = (
+        db.Index("ix_support_chat_from_id_is_closed", "from_id", "is_closed"),
+        db.Index("ix_support_chat_to_id_is_closed", "to_id", "is_closed"),
+    )
+
 
 class Admin(db.Model):
     admin_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String, nullable=False, default="Test")
     email = db.Column(db.String, nullable=False, default="test@gmail.com")
     password = db.Column(db.String, nullable=False, default="test123")
+
+
+class SchedulerLease(db.Model):
+    name = db.Column(db.String, primary_key=True)
+    holder = db.Column(db.String, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class JobRun(db.Model):
+    run_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    job_id = db.Column(db.String, nullable=False)
+    holder = db.Column(db.String, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    duration = db.Column(db.Double, nullable=True)
+    status = db.Column(db.String, nullable=False, default="RUNNING")
+    result = db.Column(db.String, nullable=False, default="")
+
+    __table_args__ = (
+        db.Index("ix_job_run_job_id_started_at", "job_id", "started_at"),
+    )
+
+
+class PushOutbox(db.Model):
+    outbox_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    token = db.Column(db.String, nullable=False)
+    title = db.Column(db.String, nullable=False)
+    body = db.Column(db.String, nullable=False)
+    status = db.Column(db.String, nullable=False, default="PENDING")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    last_error = db.Column(db.String, nullable=False, default="")
+
+    __table_args__ = (
+        db.Index("ix_push_outbox_next_attempt_at_pending", "next_attempt_at", sqlite_where=db.text("status = 'PENDING'"), postgresql_where=db.text("status = 'PENDING'")),
+    )
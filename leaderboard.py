@@ -0,0 +1,108 @@
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from sqlalchemy import inspect
+
+from config import LEADERBOARD_TTL, LEADERBOARD_SIZE, db
+from db import User, CourseSkill
+from session_changes import on_commit, IncrementalIndex
+
+LeaderboardEntry = namedtuple("LeaderboardEntry", ["user_id", "name", "image_path", "is_banned", "ratings", "courses"])
+
+# role -> (total rating column, number of rates column)
+RATING_FIELDS = {
+    "STUDENT": ("total_rating_as_student", "number_of_rates_as_student"),
+    "TUTOR": ("total_rating_as_tutor", "number_of_rates_as_tutor")
+}
+
+RANKED_USER_FIELDS = ("name", "image_path", "is_banned", *[x for fields in RATING_FIELDS.values() for x in fields])
+
+
+def rank_key(user_id, total, number):
+    # Best average first, users nobody has rated yet after everyone else, ties by id
+    if number:
+        return 0, -(total / number), user_id
+    return 1, 0.0, user_id
+
+
+class Board:
+    # Rank keys kept sorted, so the top K is a slice
+    def __init__(self):
+        self.keys = []
+        self.positions = {}
+
+    def remove(self, user_id):
+        key = self.positions.pop(user_id, None)
+        if key is not None:
+            del self.keys[bisect_left(self.keys, key)]
+
+    def put(self, user_id, key):
+        self.remove(user_id)
+        self.positions[user_id] = key
+        insort(self.keys, key)
+
+    def top(self, size):
+        return [x[-1] for x in self.keys[:size]]
+
+
+class Leaderboard(IncrementalIndex):
+    # One board per role and one per (role, course id), maintained from committed User and CourseSkill changes
+    def __init__(self):
+        super().__init__(LEADERBOARD_TTL)
+
+    def clear(self):
+        self.entries = {}
+        self.boards = {}
+
+    def load_entries(self, user_ids=None):
+        query = db.session.query(User.id, *[getattr(User, x) for x in RANKED_USER_FIELDS])
+        skills = db.session.query(CourseSkill.user_id, CourseSkill.role, CourseSkill.course_id)
+        if user_ids is not None:
+            query = query.filter(User.id.in_(user_ids))
+            skills = skills.filter(CourseSkill.user_id.in_(user_ids))
+
+        entries = {}
+        for row in query.all():
+            ratings = {role: (getattr(row, total), getattr(row, number)) for role, (total, number) in RATING_FIELDS.items()}
+            entries[row.id] = LeaderboardEntry(row.id, row.name, row.image_path, row.is_banned, ratings, {role: set() for role in RATING_FIELDS})
+        for user_id, role, course_id in skills.all():
+            if user_id in entries and role in RATING_FIELDS:
+                entries[user_id].courses[role].add(course_id)
+        return entries
+
+    def board_keys(self, entry):
+        if entry.is_banned:
+            return []
+        return [x for role in RATING_FIELDS for x in [role, *[(role, course_id) for course_id in entry.courses[role]]]]
+
+    def remove_entry(self, user_id):
+        entry = self.entries.pop(user_id, None)
+        if entry:
+            for key in self.board_keys(entry):
+                self.boards[key].remove(user_id)
+
+    def add_entry(self, entry):
+        self.entries[entry.user_id] = entry
+        for key in self.board_keys(entry):
+            role = key if isinstance(key, str) else key[0]
+            self.boards.setdefault(key, Board()).put(entry.user_id, rank_key(entry.user_id, *entry.ratings[role]))
+
+    def top(self, role, course_id=None, size=LEADERBOARD_SIZE):
+        self.refresh()
+        with self.lock:
+            board = self.boards.get(role if course_id is None else (role, course_id))
+            return [self.entries[x] for x in board.top(size)] if board else []
+
+
+leaderboard = Leaderboard()
+
+
+def collect_leaderboard_changes(session, obj):
+    if isinstance(obj, CourseSkill):
+        return (obj.user_id,)
+    if isinstance(obj, User) and (obj in session.new or obj in session.deleted or any(inspect(obj).attrs[x].history.has_changes() for x in RANKED_USER_FIELDS)):
+        return (obj.id,)
+    return ()
+
+
+on_commit("leaderboard", collect_leaderboard_changes, leaderboard.mark_stale)
@@ -0,0 +1,113 @@
+import smtplib
+import ssl
+from email.mime.text import MIMEText
+from functools import lru_cache
+from queue import Queue, Empty
+from threading import Thread, Lock
+
+from config import api, MAIL_TRANSPORT, MAIL_HOST, MAIL_PORT, MAIL_SENDER, MAIL_WORKERS, MAIL_IDLE_SECONDS, PASSWORD
+
+
+class SmtpTransport:
+    # One authenticated connection, opened on first use and kept for the next messages
+    def __init__(self):
+        self.smtp = None
+
+    def connect(self):
+        smtp = smtplib.SMTP_SSL(MAIL_HOST, MAIL_PORT, context=ssl.create_default_context())
+        smtp.login(MAIL_SENDER, PASSWORD)
+        return smtp
+
+    def send(self, receiver, message):
+        if self.smtp is None:
+            self.smtp = self.connect()
+        try:
+            self.smtp.sendmail(MAIL_SENDER, receiver, message)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the idle connection, reconnect once and resend
+            self.smtp = self.connect()
+            self.smtp.sendmail(MAIL_SENDER, receiver, message)
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except smtplib.SMTPException:
+                pass
+            self.smtp = None
+
+
+class LocalSmtpTransport(SmtpTransport):
+    # Plain, unauthenticated SMTP for a local stand-in such as `python -m aiosmtpd -n`
+    def connect(self):
+        return smtplib.SMTP(MAIL_HOST, MAIL_PORT)
+
+
+class FakeTransport:
+    # Shared by every worker so tests and benchmarks can read what was sent
+    sent = []
+
+    def send(self, receiver, message):
+        self.sent.append((receiver, message))
+
+    def close(self):
+        pass
+
+
+TRANSPORTS = {
+    "smtp": SmtpTransport,
+    "local": LocalSmtpTransport,
+    "fake": FakeTransport
+}
+
+mail_queue = Queue()
+mail_state = {"workers": 0}
+mail_lock = Lock()
+
+
+@lru_cache(maxsize=None)
+def get_mail_template(name):
+    return api.jinja_env.get_template(f"mail/{name}.html")
+
+
+def render_mail(receiver, subject, template, **context):
+    msg = MIMEText(get_mail_template(template).render(**context), "html")
+    msg["Subject"] = subject
+    msg["From"] = MAIL_SENDER
+    msg["To"] = receiver
+    return msg.as_string()
+
+
+def mail_worker():
+    transport = TRANSPORTS[MAIL_TRANSPORT]()
+    while True:
+        try:
+            receiver, message = mail_queue.get(timeout=MAIL_IDLE_SECONDS)
+        except Empty:
+            # Nothing to send for a while, let the server have its connection back
+            transport.close()
+            continue
+
+        try:
+            transport.send(receiver, message)
+        except Exception:
+            transport.close()
+            api.logger.exception("Sending mail to %s failed", receiver)
+        finally:
+            mail_queue.task_done()
+
+
+def start_mail_workers():
+    if mail_state["workers"] >= MAIL_WORKERS:
+        return
+    with mail_lock:
+        while mail_state["workers"] < MAIL_WORKERS:
+            Thread(target=mail_worker, name=f"mail-worker-{mail_state['workers']}", daemon=True).start()
+            mail_state["workers"] = mail_state["workers"] + 1
+
+
+def send_mail(receiver, subject, template, **context):
+    # Renders now, so template errors still reach the caller, and leaves the SMTP round trips to the workers
+    message = render_mail(receiver, subject, template, **context)
+    start_mail_workers()
+    mail_queue.put((receiver, message))
@@ -0,0 +1,41 @@
+"""add expiry indexes
+
+Revision ID: 3c9d41f27a8e
+Revises: 812450d6de4a
+Create Date: 2026-10-18 14:20:12.118264
+
+Partial indexes on the deadline columns of the rows check_expires can still
+expire, so each sweep is an index range scan instead of a full table scan.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d41f27a8e'
+down_revision = '812450d6de4a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.create_index('ix_assignment_dead_line_uncompleted', ['dead_line'], unique=False, if_not_exists=True, sqlite_where=sa.text("status = 'UNCOMPLETED'"), postgresql_where=sa.text("status = 'UNCOMPLETED'"))
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.create_index('ix_message_expire_date_waiting', ['expire_date'], unique=False, if_not_exists=True, sqlite_where=sa.text("status = 'WAITING'"), postgresql_where=sa.text("status = 'WAITING'"))
+
+    with op.batch_alter_table('session', schema=None) as batch_op:
+        batch_op.create_index('ix_session_expire_date_upcoming', ['expire_date'], unique=False, if_not_exists=True, sqlite_where=sa.text("status = 'UPCOMING'"), postgresql_where=sa.text("status = 'UPCOMING'"))
+
+
+def downgrade():
+    with op.batch_alter_table('session', schema=None) as batch_op:
+        batch_op.drop_index('ix_session_expire_date_upcoming', if_exists=True)
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_expire_date_waiting', if_exists=True)
+
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.drop_index('ix_assignment_dead_line_uncompleted', if_exists=True)
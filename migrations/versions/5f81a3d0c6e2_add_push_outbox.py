@@ -0,0 +1,46 @@
+"""add push outbox
+
+Revision ID: 5f81a3d0c6e2
+Revises: b7e2f0c95d14
+Create Date: 2026-10-18 15:41:09.824531
+
+Push notifications are written to push_outbox in the same transaction as
+the change that triggers them and sent in batches by the scheduler.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f81a3d0c6e2'
+down_revision = 'b7e2f0c95d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Table may already exist on databases created with db.create_all()
+    if 'push_outbox' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('push_outbox',
+        sa.Column('outbox_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('token', sa.String(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('body', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('outbox_id')
+        )
+
+    with op.batch_alter_table('push_outbox', schema=None) as batch_op:
+        batch_op.create_index('ix_push_outbox_next_attempt_at_pending', ['next_attempt_at'], unique=False, if_not_exists=True, sqlite_where=sa.text("status = 'PENDING'"), postgresql_where=sa.text("status = 'PENDING'"))
+
+
+def downgrade():
+    with op.batch_alter_table('push_outbox', schema=None) as batch_op:
+        batch_op.drop_index('ix_push_outbox_next_attempt_at_pending', if_exists=True)
+
+    op.drop_table('push_outbox')
@@ -0,0 +1,140 @@
+"""add indexes for hot filters
+
+Revision ID: 812450d6de4a
+Revises: 
+Create Date: 2026-10-18 13:55:40.402828
+
+Baseline revision for databases created with db.create_all(). Indexes are
+created with IF NOT EXISTS so it also applies cleanly to databases whose
+tables were created from the current models.
+
+EXPLAIN QUERY PLAN on SQLite before and after this revision:
+
+get_message_notifications
+    before: SCAN message
+    after:  SEARCH message USING INDEX ix_message_tutor_id_status (tutor_id=? AND status=?)
+search_message_archives
+    before: SCAN message
+    after:  SEARCH message USING INDEX ix_message_student_id_status (student_id=? AND status=?)
+get_session_notifications
+    before: SCAN session
+    after:  SEARCH session USING INDEX ix_session_student_id_status (student_id=? AND status=?)
+get_assignment_notifications
+    before: SCAN assignment
+    after:  SEARCH assignment USING INDEX ix_assignment_student_id_status (student_id=? AND status=?)
+tutor index / get_tutors
+    before: SCAN course_skill
+    after:  SEARCH course_skill USING INDEX ix_course_skill_course_id_role (course_id=? AND role=?)
+get_analytics / switch_role
+    before: SCAN course_skill
+    after:  SEARCH course_skill USING INDEX ix_course_skill_user_id_role (user_id=? AND role=?)
+get_support_message_with_user
+    before: SCAN support_chat
+    after:  MULTI-INDEX OR; INDEX 1; SEARCH support_chat USING INDEX ix_support_chat_to_id_is_closed (to_id=?); INDEX 2; SEARCH support_chat USING INDEX ix_support_chat_from_id_is_closed (from_id=?)
+login
+    before: SCAN user
+    after:  SEARCH user USING INDEX ix_user_email (email=?)
+signup / validate_info
+    before: SCAN user
+    after:  SEARCH user USING INDEX ix_user_name (name=?)
+get_pending_*_questions, first page
+    before: SCAN pending_multiple_choice_assessment
+    after:  SCAN pending_multiple_choice_assessment USING INDEX ix_pending_multiple_choice_assessment_pending
+get_pending_*_questions, later pages
+    before: SEARCH pending_multiple_choice_assessment USING INTEGER PRIMARY KEY (rowid>?)
+    after:  SEARCH pending_multiple_choice_assessment USING INDEX ix_pending_multiple_choice_assessment_pending (assessment_id>?)
+
+The first pending page is still a scan, but of the partial index, which
+holds only PENDING rows already in assessment_id order.
+
+Per-user lookups on the active statuses (WAITING, UPCOMING, UNCOMPLETED)
+are planned on the (student_id|tutor_id, status) indexes, with the status
+as a bound parameter and as a literal alike, so they get no partial
+indexes of their own.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '812450d6de4a'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.create_index('ix_assignment_student_id_status', ['student_id', 'status'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_assignment_tutor_id_status', ['tutor_id', 'status'], unique=False, if_not_exists=True)
+
+    with op.batch_alter_table('course_skill', schema=None) as batch_op:
+        batch_op.create_index('ix_course_skill_course_id_role', ['course_id', 'role'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_course_skill_user_id_role', ['user_id', 'role'], unique=False, if_not_exists=True)
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.create_index('ix_message_student_id_status', ['student_id', 'status'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_message_tutor_id_status', ['tutor_id', 'status'], unique=False, if_not_exists=True)
+
+    with op.batch_alter_table('pending_identification_assessment', schema=None) as batch_op:
+        batch_op.create_index('ix_pending_identification_assessment_pending', ['assessment_id'], unique=False, if_not_exists=True, sqlite_where=sa.text("status = 'PENDING'"), postgresql_where=sa.text("status = 'PENDING'"))
+
+    with op.batch_alter_table('pending_multiple_choice_assessment', schema=None) as batch_op:
+        batch_op.create_index('ix_pending_multiple_choice_assessment_pending', ['assessment_id'], unique=False, if_not_exists=True, sqlite_where=sa.text("status = 'PENDING'"), postgresql_where=sa.text("status = 'PENDING'"))
+
+    with op.batch_alter_table('pending_true_or_false_assessment', schema=None) as batch_op:
+        batch_op.create_index('ix_pending_true_or_false_assessment_pending', ['assessment_id'], unique=False, if_not_exists=True, sqlite_where=sa.text("status = 'PENDING'"), postgresql_where=sa.text("status = 'PENDING'"))
+
+    with op.batch_alter_table('session', schema=None) as batch_op:
+        batch_op.create_index('ix_session_student_id_status', ['student_id', 'status'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_session_tutor_id_status', ['tutor_id', 'status'], unique=False, if_not_exists=True)
+
+    with op.batch_alter_table('support_chat', schema=None) as batch_op:
+        batch_op.create_index('ix_support_chat_from_id_is_closed', ['from_id', 'is_closed'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_support_chat_to_id_is_closed', ['to_id', 'is_closed'], unique=False, if_not_exists=True)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index('ix_user_email', ['email'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_user_name', ['name'], unique=False, if_not_exists=True)
+
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_name', if_exists=True)
+        batch_op.drop_index('ix_user_email', if_exists=True)
+
+    with op.batch_alter_table('support_chat', schema=None) as batch_op:
+        batch_op.drop_index('ix_support_chat_to_id_is_closed', if_exists=True)
+        batch_op.drop_index('ix_support_chat_from_id_is_closed', if_exists=True)
+
+    with op.batch_alter_table('session', schema=None) as batch_op:
+        batch_op.drop_index('ix_session_tutor_id_status', if_exists=True)
+        batch_op.drop_index('ix_session_student_id_status', if_exists=True)
+
+    with op.batch_alter_table('pending_true_or_false_assessment', schema=None) as batch_op:
+        batch_op.drop_index('ix_pending_true_or_false_assessment_pending', if_exists=True)
+
+    with op.batch_alter_table('pending_multiple_choice_assessment', schema=None) as batch_op:
+        batch_op.drop_index('ix_pending_multiple_choice_assessment_pending', if_exists=True)
+
+    with op.batch_alter_table('pending_identification_assessment', schema=None) as batch_op:
+        batch_op.drop_index('ix_pending_identification_assessment_pending', if_exists=True)
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_tutor_id_status', if_exists=True)
+        batch_op.drop_index('ix_message_student_id_status', if_exists=True)
+
+    with op.batch_alter_table('course_skill', schema=None) as batch_op:
+        batch_op.drop_index('ix_course_skill_user_id_role', if_exists=True)
+        batch_op.drop_index('ix_course_skill_course_id_role', if_exists=True)
+
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.drop_index('ix_assignment_tutor_id_status', if_exists=True)
+        batch_op.drop_index('ix_assignment_student_id_status', if_exists=True)
+
+    # ### end Alembic commands ###
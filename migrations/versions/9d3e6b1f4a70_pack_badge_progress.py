@@ -0,0 +1,67 @@
+"""pack badge progress
+
+Revision ID: 9d3e6b1f4a70
+Revises: 5f81a3d0c6e2
+Create Date: 2026-10-18 16:27:31.402117
+
+badge_progress_as_student and badge_progress_as_tutor change from 28
+comma-joined floats to 28 packed little-endian float32 values.
+
+"""
+import struct
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3e6b1f4a70'
+down_revision = '5f81a3d0c6e2'
+branch_labels = None
+depends_on = None
+
+PROGRESS_FORMAT = struct.Struct("<28f")
+COLUMNS = ('badge_progress_as_student', 'badge_progress_as_tutor')
+
+
+def convert(to_type, value_to):
+    bind = op.get_bind()
+    user = sa.table('user', sa.column('id', sa.Integer), *[sa.column(x) for x in COLUMNS])
+    rows = bind.execute(sa.select(user)).all()
+
+    # SQLite rebuilds the table for the type change, which drops the full-text search triggers on it
+    triggers = []
+    if bind.dialect.name == 'sqlite':
+        triggers = [x[0] for x in bind.execute(sa.text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'user'")).all()]
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        for x in COLUMNS:
+            batch_op.alter_column(x, type_=to_type, existing_nullable=False)
+
+    for trigger in triggers:
+        op.execute(trigger)
+
+    user = sa.table('user', sa.column('id', sa.Integer), *[sa.column(x, to_type) for x in COLUMNS])
+    values = [{'b_id': row[0], **{x: value_to(row[i + 1]) for i, x in enumerate(COLUMNS)}} for row in rows]
+    if values:
+        bind.execute(user.update().where(user.c.id == sa.bindparam('b_id')), values)
+
+
+def to_packed(value):
+    if isinstance(value, str):
+        return PROGRESS_FORMAT.pack(*[float(x) for x in value.split(',')])
+    return bytes(value)
+
+
+def to_string(value):
+    if isinstance(value, str):
+        return value
+    return ','.join(str(x) for x in PROGRESS_FORMAT.unpack(value))
+
+
+def upgrade():
+    convert(sa.LargeBinary(), to_packed)
+
+
+def downgrade():
+    convert(sa.String(), to_string)
@@ -0,0 +1,56 @@
+"""add scheduler lease and job run
+
+Revision ID: b7e2f0c95d14
+Revises: 3c9d41f27a8e
+Create Date: 2026-10-18 15:02:47.530118
+
+scheduler_lease holds the single row naming the worker allowed to run
+scheduled jobs; job_run records every run the leader made.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2f0c95d14'
+down_revision = '3c9d41f27a8e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tables may already exist on databases created with db.create_all()
+    tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'scheduler_lease' not in tables:
+        op.create_table('scheduler_lease',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('holder', sa.String(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+        )
+
+    if 'job_run' not in tables:
+        op.create_table('job_run',
+        sa.Column('run_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('job_id', sa.String(), nullable=False),
+        sa.Column('holder', sa.String(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration', sa.Double(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('result', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('run_id')
+        )
+
+    with op.batch_alter_table('job_run', schema=None) as batch_op:
+        batch_op.create_index('ix_job_run_job_id_started_at', ['job_id', 'started_at'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table('job_run', schema=None) as batch_op:
+        batch_op.drop_index('ix_job_run_job_id_started_at', if_exists=True)
+
+    op.drop_table('job_run')
+    op.drop_table('scheduler_lease')
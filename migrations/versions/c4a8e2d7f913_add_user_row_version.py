@@ -0,0 +1,29 @@
+"""add user row version
+
+Revision ID: c4a8e2d7f913
+Revises: 9d3e6b1f4a70
+Create Date: 2026-10-18 18:02:47.316520
+
+user.row_version is bumped by every write that changes a per-user view,
+conditional GETs derive their ETags from it.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a8e2d7f913'
+down_revision = '9d3e6b1f4a70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Column may already exist on databases created with db.create_all(); a plain ADD COLUMN keeps the user triggers
+    if 'row_version' not in [x['name'] for x in sa.inspect(op.get_bind()).get_columns('user')]:
+        op.add_column('user', sa.Column('row_version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    op.drop_column('user', 'row_version')
@@ -0,0 +1,68 @@
+from base64 import b64decode
+
+import msgpack
+from flask import current_app, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+MIMETYPES = {"json": "application/json", "msgpack": "application/msgpack"}
+
+
+class EncodedImage(str):
+    # Base64 PNG as built by encode_image, MessagePack clients get the raw bytes instead
+    __slots__ = ()
+
+
+def response_format():
+    # MessagePack only when the client asks for it over JSON, anything else keeps JSON
+    if has_request_context() and request.accept_mimetypes.best_match([MIMETYPES["json"], MIMETYPES["msgpack"]]) == MIMETYPES["msgpack"]:
+        return "msgpack"
+    return "json"
+
+
+class NegotiatingJSONProvider(DefaultJSONProvider):
+    # jsonify goes through response(), so every blueprint speaks MessagePack without touching its routes
+    def pack_default(self, obj):
+        if isinstance(obj, EncodedImage):
+            return b64decode(obj)
+        # strict_types sends every subclass here, so the image check above sees EncodedImage before it passes as str
+        for base in (str, int, float, list, dict):
+            if isinstance(obj, base):
+                return base(obj)
+        if isinstance(obj, tuple):
+            return list(obj)
+        return self.default(obj)
+
+    def packb(self, obj):
+        return msgpack.packb(obj, default=self.pack_default, strict_types=True)
+
+    def response(self, *args, **kwargs):
+        if response_format() == "msgpack":
+            # Same arguments jsonify documents: one value as is, several as a list, keywords as a dict
+            if args and kwargs:
+                raise TypeError("jsonify() behavior undefined when passed both args and kwargs")
+            obj = args[0] if len(args) == 1 else list(args) or kwargs or None
+            response = self._app.response_class(self.packb(obj), mimetype=MIMETYPES["msgpack"])
+        else:
+            response = super().response(*args, **kwargs)
+        response.vary.add("Accept")
+        return response
+
+
+def dumps(obj, fmt):
+    if fmt == "msgpack":
+        return current_app.json.packb(obj)
+    return current_app.json.dumps(obj).encode("utf-8")
+
+
+def envelope(fmt, fields, key="data"):
+    # Bytes before and after already serialized data, together {key: data, **fields}
+    if fmt == "msgpack":
+        return bytes([0x80 | (len(fields) + 1)]) + dumps(key, fmt), b"".join(dumps(x, fmt) + dumps(y, fmt) for x, y in fields)
+    return b"{" + dumps(key, fmt) + b":", b"".join(b"," + dumps(x, fmt) + b":" + dumps(y, fmt) for x, y in fields) + b"}"
+
+
+def array(fmt, items):
+    # Already serialized items as one array
+    if fmt == "msgpack":
+        return msgpack.Packer().pack_array_header(len(items)) + b"".join(items)
+    return b"[" + b",".join(items) + b"]"
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from firebase_admin import messaging, exceptions
+
+from config import db, PUSH_TRANSPORT, PUSH_BATCH_SIZE, PUSH_MAX_ATTEMPTS, PUSH_RETRY_SECONDS
+from db import PushOutbox
+
+# Errors retrying cannot fix, the token is gone or the message is malformed
+PERMANENT_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError, exceptions.InvalidArgumentError)
+
+
+class FirebaseTransport:
+    def send(self, notifications):
+        response = messaging.send_each([
+            messaging.Message(
+                data={
+                    "title": x.title,
+                    "body": x.body
+                },
+                android=messaging.AndroidConfig(priority="high"),
+                token=x.token
+            )
+            for x in notifications
+        ])
+        return [x.exception for x in response.responses]
+
+
+class FakeTransport:
+    # Keeps what would have been pushed, for local runs, tests and benchmarks
+    def __init__(self):
+        self.sent = []
+
+    def send(self, notifications):
+        self.sent.extend({"token": x.token, "title": x.title, "body": x.body} for x in notifications)
+        return [None] * len(notifications)
+
+
+TRANSPORTS = {
+    "firebase": FirebaseTransport,
+    "fake": FakeTransport
+}
+
+transport = TRANSPORTS[PUSH_TRANSPORT]()
+
+
+def set_transport(new_transport):
+    global transport
+    transport = new_transport
+
+
+def queue_notification(token, title, body):
+    # Added to the caller's session so the push is only queued if its business change commits
+    if token:
+        db.session.add(PushOutbox(token=token, title=title, body=body))
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=PUSH_RETRY_SECONDS * 2 ** (attempts - 1))
+
+
+def dispatch_notifications():
+    sent = 0
+    failed = 0
+
+    while True:
+        now = datetime.now()
+        notifications = PushOutbox.query.filter(
+            PushOutbox.status == "PENDING",
+            PushOutbox.next_attempt_at <= now
+        ).order_by(PushOutbox.next_attempt_at, PushOutbox.outbox_id).limit(PUSH_BATCH_SIZE).all()
+        if not notifications:
+            break
+
+        try:
+            errors = transport.send(notifications)
+        except Exception as e:
+            errors = [e] * len(notifications)
+
+        for notification, error in zip(notifications, errors):
+            notification.attempts = notification.attempts + 1
+            if error is None:
+                notification.status = "SENT"
+                notification.last_error = ""
+                sent = sent + 1
+            else:
+                notification.last_error = str(error)
+                if isinstance(error, PERMANENT_ERRORS) or notification.attempts >= PUSH_MAX_ATTEMPTS:
+                    notification.status = "FAILED"
+                    failed = failed + 1
+                else:
+                    notification.next_attempt_at = now + retry_delay(notification.attempts)
+        db.session.commit()
+
+        if len(notifications) < PUSH_BATCH_SIZE:
+            break
+
+    return {"sent": sent, "failed": failed}
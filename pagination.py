@@ -0,0 +1,82 @@
+import json
+import math
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+
+from flask import request, jsonify
+from sqlalchemy import tuple_
+
+from config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+def encode_cursor(values):
+    return urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode('ascii')
+
+
+def decode_cursor(cursor):
+    # Malformed base64, JSON or text all surface as ValueError subclasses
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode('ascii')))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    # Every sort key is an id, a rank or a score, anything else would fail later when compared against them
+    if not isinstance(values, list) or not values or not all(is_cursor_value(x) for x in values):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def is_cursor_value(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def check_cursor():
+    # Runs before every route, whose catch-all would otherwise turn a tampered cursor into a 500
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e), "type": "error"}), 400
+    return None
+
+
+def get_page():
+    # Paging is opt-in: clients send page_size and/or the cursor returned as nextCursor by the previous page
+    page_size = request.args.get("page_size", type=int)
+    cursor = request.args.get("cursor")
+    if page_size is None and not cursor:
+        return None
+    return {
+        "size": max(1, min(page_size or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)),
+        "after": decode_cursor(cursor) if cursor else None
+    }
+
+
+def end_page(rows, page, key):
+    if len(rows) > page["size"]:
+        rows = rows[:page["size"]]
+        return rows, encode_cursor(key(rows[-1]))
+    return rows, None
+
+
+def paginate_query(query, columns, page):
+    query = query.order_by(*columns)
+    if page is None:
+        return query.all(), None
+
+    if page["after"] is not None:
+        if len(columns) == 1:
+            query = query.filter(columns[0] > page["after"][0])
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*page["after"]))
+    rows = query.limit(page["size"] + 1).all()
+    return end_page(rows, page, lambda row: [getattr(row, x.key) for x in columns])
+
+
+def paginate_list(items, key, page):
+    # For results ordered in memory (ranked searches, the tutor index); items must already be sorted by key
+    if page is None:
+        return items, None
+
+    if page["after"] is not None:
+        items = [x for x in items if key(x) > page["after"]]
+    return end_page(items[:page["size"] + 1], page, key)
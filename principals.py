@@ -0,0 +1,68 @@
+import time
+from threading import Lock
+
+import jwt
+from cachetools import TTLCache, TLRUCache
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+from config import api, PRINCIPAL_CACHE_TTL, PRINCIPAL_CACHE_SIZE
+from db import User, Admin
+from session_changes import on_commit
+
+PRINCIPAL_FIELDS = {
+    User: ("id", "name", "email", "role", "degree", "primary_learning_pattern", "secondary_learning_pattern", "is_banned"),
+    Admin: ("admin_id", "name", "email")
+}
+
+# Decoded tokens live until their own exp claim, principals for PRINCIPAL_CACHE_TTL seconds so other workers catch up
+token_cache = TLRUCache(maxsize=PRINCIPAL_CACHE_SIZE, ttu=lambda key, value, now: value.get("exp", now), timer=time.time)
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+principal_lock = Lock()
+
+
+def decode_token(token):
+    with principal_lock:
+        data = token_cache.get(token)
+    if data is None:
+        data = jwt.decode(token, api.config['SECRET_KEY'], algorithms=['HS256'])
+        with principal_lock:
+            token_cache[token] = data
+    return data
+
+
+def get_principal(model, principal_id):
+    key = (model.__name__, principal_id)
+    with principal_lock:
+        principal = principal_cache.get(key)
+    if principal is None:
+        fields = PRINCIPAL_FIELDS[model]
+        row = model.query.options(load_only(*[getattr(model, x) for x in fields])).filter(getattr(model, fields[0]) == principal_id).first()
+        principal = {x: getattr(row, x) for x in fields}
+        with principal_lock:
+            principal_cache[key] = principal
+    return principal
+
+
+def get_user(user_id):
+    return get_principal(User, user_id)
+
+
+def get_admin(admin_id):
+    return get_principal(Admin, admin_id)
+
+
+def invalidate_principals(keys):
+    with principal_lock:
+        for key in keys:
+            principal_cache.pop(key, None)
+
+
+def collect_principal_changes(session, obj):
+    fields = PRINCIPAL_FIELDS.get(type(obj))
+    if fields and obj not in session.new and (obj in session.deleted or any(inspect(obj).attrs[x].history.has_changes() for x in fields)):
+        return ((type(obj).__name__, getattr(obj, fields[0])),)
+    return ()
+
+
+on_commit("principal", collect_principal_changes, invalidate_principals)
@@ -0,0 +1,101 @@
+import random
+import sys
+import time
+from threading import Lock
+
+from sqlalchemy import inspect
+
+from config import QUESTION_BANK_TTL
+from db import MultipleChoiceAssessment, IdentificationAssessment, TrueOrFalseAssessment
+from session_changes import on_commit
+
+
+def serialize_multiple_choice(x):
+    return x.module, x.question, x.letter_a, x.letter_b, x.letter_c, x.letter_d, x.answer, x.creator
+
+
+def serialize_identification(x):
+    return x.module, x.question, x.answer, x.creator
+
+
+def serialize_true_or_false(x):
+    return x.module, x.question, str(x.answer), x.creator
+
+
+# Assessment category -> (question model, row in the shape get_assessment returns)
+QUESTION_CATEGORIES = {
+    "Multiple Choice": (MultipleChoiceAssessment, serialize_multiple_choice),
+    "Identification": (IdentificationAssessment, serialize_identification),
+    "True or False": (TrueOrFalseAssessment, serialize_true_or_false)
+}
+
+QUESTION_MODELS = tuple(model for model, _ in QUESTION_CATEGORIES.values())
+
+
+class QuestionBank:
+    # (model, course id) -> every question of the course as an immutable tuple of serialized rows, sampled in memory
+    def __init__(self):
+        self.banks = {}
+        self.generations = {}
+        self.load_locks = {}
+        self.lock = Lock()
+
+    def invalidate(self, keys):
+        with self.lock:
+            for key in keys:
+                self.banks.pop(key, None)
+                self.generations[key] = self.generations.get(key, 0) + 1
+
+    def load(self, model, serialize, course_id):
+        rows = []
+        for x in model.query.filter_by(course_id=course_id).order_by(model.assessment_id).all():
+            row = serialize(x)
+            # Modules and creators repeat across a course, share one string per distinct value
+            rows.append((sys.intern(row[0]), *row[1:-1], sys.intern(row[-1])))
+        return tuple(rows)
+
+    def is_fresh(self, entry):
+        # Invalidations only reach this worker, banks older than QUESTION_BANK_TTL seconds pick up everyone else's edits
+        return entry is not None and time.monotonic() - entry[0] <= QUESTION_BANK_TTL
+
+    def get_rows(self, model, serialize, course_id):
+        key = (model, int(course_id))
+        entry = self.banks.get(key)
+        if self.is_fresh(entry):
+            return entry[1]
+
+        # One loader per course, the shared lock is never held across the query so other courses keep sampling
+        with self.lock:
+            load_lock = self.load_locks.setdefault(key, Lock())
+        with load_lock:
+            entry = self.banks.get(key)
+            if self.is_fresh(entry):
+                return entry[1]
+            with self.lock:
+                generation = self.generations.get(key, 0)
+            entry = (time.monotonic(), self.load(model, serialize, key[1]))
+            with self.lock:
+                # Invalidated while loading, serve these rows once but do not keep them
+                if self.generations.get(key, 0) == generation:
+                    self.banks[key] = entry
+            return entry[1]
+
+    def sample(self, category, course_id, items=None):
+        # Random questions without replacement, the whole course shuffled when items is not given
+        model, serialize = QUESTION_CATEGORIES.get(category, QUESTION_CATEGORIES["True or False"])
+        rows = self.get_rows(model, serialize, course_id)
+        size = len(rows) if items is None else min(max(int(items), 0), len(rows))
+        return random.sample(rows, size)
+
+
+question_bank = QuestionBank()
+
+
+def collect_question_changes(session, obj):
+    if not isinstance(obj, QUESTION_MODELS):
+        return ()
+    history = inspect(obj).attrs.course_id.history
+    return [(type(obj), int(x)) for x in [obj.course_id, *history.deleted] if x is not None]
+
+
+on_commit("question_bank", collect_question_changes, question_bank.invalidate)
@@ -9,3 +9,4 @@ from .template_routes import template_bp
 from .admin_routes import admin_bp
 from .admin_auth_routes import admin_auth_bp
 from .admin_assessment_routes import admin_assessment_bp
+from .image_routes import image_bp
@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
 
+from catalog import catalog
 from config import db
 from db import PendingMultipleChoiceAssessment, MultipleChoiceAssessment, PendingIdentificationAssessment, \
-    IdentificationAssessment, PendingTrueOrFalseAssessment, TrueOrFalseAssessment, Course
+    IdentificationAssessment, PendingTrueOrFalseAssessment, TrueOrFalseAssessment
+from pagination import get_page, paginate_query
 from routes.admin_auth_wrapper import admin_auth_required
-from utils import map_assessments
+from utils import map_assessments_list
 
 admin_assessment_bp = Blueprint("admin_assessment_routes", __name__)
 
@@ -125,9 +127,9 @@ def disapprove_pending_true_or_false_assessment(current_admin):
 @admin_auth_required
 def get_pending_multiple_choice_questions(current_admin):
     try:
-        pending_assessments = PendingMultipleChoiceAssessment.query.filter_by(status="PENDING").all()
-        response = [*map(map_assessments, pending_assessments)]
-        return jsonify({"data": response, "type": "success"}), 200
+        pending_assessments, next_cursor = paginate_query(PendingMultipleChoiceAssessment.query.filter_by(status="PENDING"), [PendingMultipleChoiceAssessment.assessment_id], get_page())
+        response = map_assessments_list(pending_assessments)
+        return jsonify({"data": response, "nextCursor": next_cursor, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -136,9 +138,9 @@ def get_pending_multiple_choice_questions(current_admin):
 @admin_auth_required
 def get_pending_identification_questions(current_admin):
     try:
-        pending_assessments = PendingIdentificationAssessment.query.filter_by(status="PENDING").all()
-        response = [*map(map_assessments, pending_assessments)]
-        return jsonify({"data": response, "type": "success"}), 200
+        pending_assessments, next_cursor = paginate_query(PendingIdentificationAssessment.query.filter_by(status="PENDING"), [PendingIdentificationAssessment.assessment_id], get_page())
+        response = map_assessments_list(pending_assessments)
+        return jsonify({"data": response, "nextCursor": next_cursor, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -147,9 +149,9 @@ def get_pending_identification_questions(current_admin):
 @admin_auth_required
 def get_pending_true_or_false_questions(current_admin):
     try:
-        pending_assessments = PendingTrueOrFalseAssessment.query.filter_by(status="PENDING").all()
-        response = [*map(map_assessments, pending_assessments)]
-        return jsonify({"data": response, "type": "success"}), 200
+        pending_assessments, next_cursor = paginate_query(PendingTrueOrFalseAssessment.query.filter_by(status="PENDING"), [PendingTrueOrFalseAssessment.assessment_id], get_page())
+        response = map_assessments_list(pending_assessments)
+        return jsonify({"data": response, "nextCursor": next_cursor, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -159,7 +161,7 @@ def get_pending_true_or_false_questions(current_admin):
 def get_pending_multiple_choice_question(current_admin):
     try:
         pending_assessment = PendingMultipleChoiceAssessment.query.filter_by(assessment_id=request.args.get("assessment_id")).first()
-        course = Course.query.filter_by(course_id=pending_assessment.course_id).first()
+        course = catalog.get(pending_assessment.course_id)
         response = {
             "assessmentId": pending_assessment.assessment_id,
             "courseId": pending_assessment.course_id,
@@ -183,7 +185,7 @@ def get_pending_multiple_choice_question(current_admin):
 def get_pending_identification_question(current_admin):
     try:
         pending_assessment = PendingIdentificationAssessment.query.filter_by(assessment_id=request.args.get("assessment_id")).first()
-        course = Course.query.filter_by(course_id=pending_assessment.course_id).first()
+        course = catalog.get(pending_assessment.course_id)
         response = {
             "assessmentId": pending_assessment.assessment_id,
             "courseId": pending_assessment.course_id,
@@ -203,7 +205,7 @@ def get_pending_identification_question(current_admin):
 def get_pending_true_or_false_question(current_admin):
     try:
         pending_assessment = PendingTrueOrFalseAssessment.query.filter_by(assessment_id=request.args.get("assessment_id")).first()
-        course = Course.query.filter_by(course_id=pending_assessment.course_id).first()
+        course = catalog.get(pending_assessment.course_id)
         response = {
             "assessmentId": pending_assessment.assessment_id,
             "courseId": pending_assessment.course_id,
@@ -1,10 +1,8 @@
 from functools import wraps
 
-import jwt
 from flask import request, jsonify
 
-from config import api
-from db import Admin
+from principals import decode_token, get_admin
 
 
 def admin_auth_required(f):
@@ -16,12 +14,12 @@ def admin_auth_required(f):
             return jsonify({"error": "A valid token is missing!", "type": "error"}), 401
 
         try:
-            data = jwt.decode(token, api.config['SECRET_KEY'], algorithms=['HS256'])
-            admin = Admin.query.filter_by(admin_id=data["admin_id"]).first()
+            data = decode_token(token)
+            admin = get_admin(data["admin_id"])
             current_admin = {
-                "id": admin.admin_id,
-                "name": admin.name,
-                "email": admin.email
+                "id": admin["admin_id"],
+                "name": admin["name"],
+                "email": admin["email"]
             }
         except Exception as e:
             return jsonify({"error": f"Invalid token! {e}", "type": "error"}), 401
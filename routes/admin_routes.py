@@ -3,10 +3,12 @@ from itertools import groupby
 from flask import Blueprint, request, jsonify
 from sqlalchemy import or_, and_, not_
 
+from achievements import recompute_badge_progress
 from config import db
 from db import User, SupportChat
+from pagination import get_page, paginate_query
 from routes.admin_auth_wrapper import admin_auth_required
-from utils import map_search_user_admin, map_chats, support_key
+from utils import map_search_user_admin, map_chats, support_key, get_image_cache_stats
 
 admin_bp = Blueprint("admin_routes", __name__)
 
@@ -30,9 +32,9 @@ def ban_user(current_admin):
 def search_users(current_admin):
     try:
         search_query = request.args.get("search_query")
-        users = User.query.filter(User.name.ilike(f'%{search_query}%')).all()
+        users, next_cursor = paginate_query(User.query.filter(User.name.ilike(f'%{search_query}%')), [User.id], get_page())
         response = [map_search_user_admin(x) for x in users]
-        return jsonify({"data": response, "type": "success"}), 200
+        return jsonify({"data": response, "nextCursor": next_cursor, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -92,3 +94,22 @@ def close_support_chat(current_admin):
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
+
+
+@admin_bp.route("/image_cache_stats", methods=["GET"])
+@admin_auth_required
+def image_cache_stats(current_admin):
+    try:
+        return jsonify({"data": get_image_cache_stats(), "type": "success"}), 200
+    except Exception as e:
+        return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
+
+
+@admin_bp.route("/recompute_badges", methods=["POST"])
+@admin_auth_required
+def recompute_badges(current_admin):
+    try:
+        return jsonify({"data": recompute_badge_progress(), "type": "success"}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
@@ -1,11 +1,12 @@
 from flask import Blueprint, request, jsonify
-from sqlalchemy import func
 
+from catalog import catalog
 from config import db
-from db import Course, MultipleChoiceAssessment, IdentificationAssessment, TrueOrFalseAssessment, \
-    LearningPatternAssessment, User
+from db import User
+from question_bank import question_bank
 from routes.auth_wrapper import auth_optional, auth_required
-from utils import map_pattern_assessment, update_course_eligibility
+from static_responses import courses_response, course_name_and_desc_response, learning_pattern_assessment_response
+from utils import update_course_eligibility
 
 assessment_bp = Blueprint("assessment_routes", __name__)
 
@@ -14,15 +15,11 @@ assessment_bp = Blueprint("assessment_routes", __name__)
 @auth_optional
 def get_course_name_and_desc(current_user):
     try:
-        course = Course.query.filter_by(course_id=request.args.get("course_id")).first()
-        response = {
-            "name": course.course_name,
-            "description": course.course_description
-        }
-        if current_user:
-            return jsonify({"data": response, "currentUser": current_user, "type": "success"}), 200
-        else:
-            return jsonify({"data": response, "type": "unauthorized"}), 250
+        # Keyed by the catalog's own id, so spellings like "01" or " 1" do not each add a cached payload
+        course = catalog.get(request.args.get("course_id"))
+        if course is None:
+            return jsonify({"error": "Course not found", "type": "error"}), 404
+        return course_name_and_desc_response.respond(current_user, course.course_id)
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -34,17 +31,9 @@ def get_assessment(current_user):
         course_id = request.args.get("course_id")
         items = request.args.get("items")
         category = request.args.get("category")
-        if category == "Multiple Choice":
-            assessment_obj = MultipleChoiceAssessment.query.filter_by(course_id=course_id).order_by(func.random()).limit(items).all()
-            assessment = [*map(lambda x: [x.module, x.question, x.letter_a, x.letter_b, x.letter_c, x.letter_d, x.answer, x.creator], assessment_obj)]
-        elif category == "Identification":
-            assessment_obj = IdentificationAssessment.query.filter_by(course_id=course_id).order_by(func.random()).limit(items).all()
-            assessment = [*map(lambda x: [x.module, x.question, x.answer, x.creator], assessment_obj)]
-        else:
-            assessment_obj = TrueOrFalseAssessment.query.filter_by(course_id=course_id).order_by(func.random()).limit(items).all()
-            assessment = [*map(lambda x: [x.module, x.question, str(x.answer), x.creator], assessment_obj)]
+        assessment = question_bank.sample(category, course_id, items)
 
-        course = Course.query.filter_by(course_id=course_id).first()
+        course = catalog.get(course_id)
         response = {
             "name": course.course_name,
             "description": course.course_description,
@@ -62,11 +51,7 @@ def get_assessment(current_user):
 @auth_optional
 def get_courses(current_user):
     try:
-        courses = [*map(lambda x: {"id": x.course_id, "name": x.course_name, "description": x.course_description}, Course.query.all())]
-        if current_user:
-            return jsonify({"data": courses, "currentUser": current_user, "type": "success"}), 200
-        else:
-            return jsonify({"data": courses, "type": "unauthorized"}), 250
+        return courses_response.respond(current_user)
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -75,8 +60,7 @@ def get_courses(current_user):
 @auth_required
 def get_learning_pattern_assessment(current_user):
     try:
-        assessment = LearningPatternAssessment.query.order_by(func.random()).all()
-        return jsonify({"data": [map_pattern_assessment(x) for x in assessment], "currentUser": current_user, "type": "success"}), 200
+        return learning_pattern_assessment_response.respond(current_user)
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
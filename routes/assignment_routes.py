@@ -1,15 +1,14 @@
-import re
-from datetime import datetime
-
-from firebase_admin import messaging
 from flask import Blueprint, request, jsonify
 
+from achievements import achievements
+from catalog import catalog
 from config import db
-from db import Session, Course, Assignment, User
+from db import Session, Assignment, User
+from notifications import queue_notification
+from pagination import get_page, paginate_query
 from routes.auth_wrapper import auth_required
-from utils import string_to_list, map_multiple_choice_assignment, map_identification_assignment, \
-    map_true_or_false_assignment, string_to_int_list, map_assignments, map_archive_assignments, string_to_double_list, \
-    compute_achievement_progress, match_date, list_to_string, check_completed_achievements
+from utils import map_multiple_choice_assignment, map_identification_assignment, map_true_or_false_assignment, \
+    string_to_int_list, map_assignments_list, map_archive_assignments
 
 assignment_bp = Blueprint("assignment_routes", __name__)
 
@@ -21,11 +20,11 @@ def get_session_for_assignment(current_user):
         session = Session.query.filter_by(session_id=request.args.get("session_id")).first()
 
         if session.status == "UPCOMING":
-            course = Course.query.filter_by(course_id=session.course_id).first()
+            course = catalog.get(session.course_id)
             response = {
                 "sessionId": session.session_id,
                 "courseName": course.course_name,
-                "moduleName": string_to_list(course.modules)[session.module_id],
+                "moduleName": course.modules[session.module_id],
                 "startTime": session.start_time.strftime("%d/%m/%Y %I:%M %p"),
                 "endTime": session.end_time.strftime("%d/%m/%Y %I:%M %p"),
                 "location": session.location,
@@ -53,7 +52,7 @@ def get_assignment(current_user):
                 assignment.student_viewed = True
                 db.session.commit()
 
-            course = Course.query.filter_by(course_id=assignment.course_id).first()
+            course = catalog.get(assignment.course_id)
 
             if assignment.type == "Multiple Choice":
                 assessment = [*map(map_multiple_choice_assignment, string_to_int_list(assignment.data))]
@@ -83,12 +82,13 @@ def get_assignment_notifications(current_user):
         user_id = current_user["id"]
         role = current_user["role"]
         if role == "STUDENT":
-            assignments = Assignment.query.filter_by(student_id=user_id, status="UNCOMPLETED").all()
+            query = Assignment.query.filter_by(student_id=user_id, status="UNCOMPLETED")
         else:
-            assignments = Assignment.query.filter_by(tutor_id=user_id, status="UNCOMPLETED").all()
+            query = Assignment.query.filter_by(tutor_id=user_id, status="UNCOMPLETED")
 
-        response = [*map(map_assignments, assignments)]
-        return jsonify({"data": response, "type": "success"}), 200
+        assignments, next_cursor = paginate_query(query, [Assignment.assignment_id], get_page())
+        response = map_assignments_list(assignments)
+        return jsonify({"data": response, "nextCursor": next_cursor, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -97,13 +97,8 @@ def get_assignment_notifications(current_user):
 @auth_required
 def search_assignment_archives(current_user):
     try:
-        search_query = request.args.get("search_query")
-        assignments = map_archive_assignments(current_user["role"], current_user["id"], request.args.get("status"))
-        if search_query:
-            response = [*filter(lambda x: re.search(search_query, x["course_name"], re.IGNORECASE) or re.search(search_query, x["module_name"], re.IGNORECASE) or re.search(search_query, x["type"], re.IGNORECASE) or match_date(datetime.strptime(x["dead_line"], "%d/%m/%Y %I:%M %p"), search_query), assignments)]
-            return jsonify({"data": response, "type": "success"}), 200
-        else:
-            return jsonify({"data": assignments, "type": "success"}), 200
+        assignments, next_cursor = map_archive_assignments(current_user["role"], current_user["id"], request.args.get("status"), request.args.get("search_query"), get_page())
+        return jsonify({"data": assignments, "nextCursor": next_cursor, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -124,33 +119,11 @@ def complete_assignment(current_user):
             student.student_points = student.student_points + (data["score"] * 0.1)
 
             # Update achievement
-            current_progress_student = string_to_double_list(student.badge_progress_as_student)
-            computed_progress_student = compute_achievement_progress(
-                student.student_points,
-                [10, 25, 50, 100, 200],
-                [7, 8, 9, 10, 11],
-                compute_achievement_progress(
-                    float(student.assignments_taken),
-                    [1, 5, 10],
-                    [19, 20, 21],
-                    current_progress_student
-                )
-            )
-            student.badge_progress_as_student = list_to_string(computed_progress_student)
-
-            notification = messaging.Message(
-                data={
-                    "title": "Student Answered Assignment",
-                    "body": student.name + " answers the assignment you gave and got " + data["score"] + " points."
-                },
-                android=messaging.AndroidConfig(priority="high"),
-                token=User.query.filter_by(id=assignment.tutor_id).first().push_notifications_token
-            )
-
-            messaging.send(notification)
+            response = achievements.update(student, "STUDENT", {"assignments_taken": student.assignments_taken, "student_points": student.student_points})
+
+            queue_notification(User.query.filter_by(id=assignment.tutor_id).first().push_notifications_token, "Student Answered Assignment", student.name + " answers the assignment you gave and got " + data["score"] + " points.")
 
             db.session.commit()
-            response = check_completed_achievements(current_progress_student, computed_progress_student, "STUDENT")
             return jsonify({"data": response, "type": "success"}), 201
         else:
             return jsonify({"error": "Assignment may be completed or deadlined", "type": "error"}), 500
@@ -1,16 +1,14 @@
 import re
-import smtplib
-import ssl
 from datetime import datetime, timedelta
-from email.mime.text import MIMEText
 
 import bcrypt
 from flask import request, jsonify, Blueprint
 
 import jwt
 
-from config import api, db, SALT, PASSWORD_REGEX, PASSWORD
+from config import api, db, SALT, PASSWORD_REGEX
 from db import User, CourseSkill
+from mailer import send_mail
 from utils import validate_login, update_course_eligibility, validate_signup, update_assessment_achievement, \
     generate_token, validate_token
 
@@ -91,18 +89,9 @@ def signup():
 @auth_bp.route("/forgot_password", methods=["POST"])
 def forgot_password():
     try:
-        email_sender = "Brianserrano503@gmail.com"
         email_receiver = request.json["email"]
-        msg = MIMEText(f'Please access the <a href="https://brianserrano.pythonanywhere.com/template_routes/forgot_password_page/{generate_token(email_receiver)}">link</a> to change your password and recover your account.', "html")
-        msg["Subject"] = "Forgot Password"
-        msg["From"] = email_sender
-        msg["To"] = email_receiver
-        context = ssl.create_default_context()
-
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as smtp:
-            smtp.login(email_sender, PASSWORD)
-            smtp.sendmail(email_sender, email_receiver, msg.as_string())
-            return jsonify({"data": {"message": "A mail for recovering your account has sent."}, "type": "success"}), 201
+        send_mail(email_receiver, "Forgot Password", "forgot_password", token=generate_token(email_receiver))
+        return jsonify({"data": {"message": "A mail for recovering your account has sent."}, "type": "success"}), 201
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
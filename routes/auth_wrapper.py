@@ -1,10 +1,8 @@
 from functools import wraps
 
-import jwt
 from flask import request, jsonify
 
-from config import api
-from db import User
+from principals import decode_token, get_user
 
 
 def auth_required(f):
@@ -16,20 +14,20 @@ def auth_required(f):
             return jsonify({"error": "A valid token is missing!", "type": "error"}), 401
         
         try:
-            data = jwt.decode(token, api.config['SECRET_KEY'], algorithms=['HS256'])
-            user = User.query.filter_by(id=data["user_id"]).first()
+            data = decode_token(token)
+            user = get_user(data["user_id"])
 
-            if user.is_banned:
+            if user["is_banned"]:
                 return jsonify({"error": "User is banned", "type": "error"}), 401
 
             current_user = {
-                "id": user.id,
-                "name": user.name,
-                "email": user.email,
-                "role": user.role,
-                "degree": user.degree,
-                "primaryLearning": user.primary_learning_pattern,
-                "secondaryLearning": user.secondary_learning_pattern
+                "id": user["id"],
+                "name": user["name"],
+                "email": user["email"],
+                "role": user["role"],
+                "degree": user["degree"],
+                "primaryLearning": user["primary_learning_pattern"],
+                "secondaryLearning": user["secondary_learning_pattern"]
             }
         except Exception as e:
             return jsonify({"error": f"Invalid token! {e}", "type": "error"}), 401
@@ -45,20 +43,20 @@ def auth_optional(f):
         token = request.headers["Authorization"]
 
         try:
-            data = jwt.decode(token, api.config['SECRET_KEY'], algorithms=['HS256'])
-            user = User.query.filter_by(id=data["user_id"]).first()
+            data = decode_token(token)
+            user = get_user(data["user_id"])
 
-            if user.is_banned:
+            if user["is_banned"]:
                 return jsonify({"error": "User is banned", "type": "error"}), 401
 
             current_user = {
-                "id": user.id,
-                "name": user.name,
-                "email": user.email,
-                "role": user.role,
-                "degree": user.degree,
-                "primaryLearning": user.primary_learning_pattern,
-                "secondaryLearning": user.secondary_learning_pattern
+                "id": user["id"],
+                "name": user["name"],
+                "email": user["email"],
+                "role": user["role"],
+                "degree": user["degree"],
+                "primaryLearning": user["primary_learning_pattern"],
+                "secondaryLearning": user["secondary_learning_pattern"]
             }
         except:
             current_user = None
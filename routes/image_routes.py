@@ -0,0 +1,33 @@
+import os
+
+from flask import Blueprint, jsonify, send_file
+from werkzeug.utils import secure_filename
+
+from config import UPLOAD_FOLDER
+from utils import get_image_digest, is_public_image, is_hashed_image
+
+image_bp = Blueprint("image_routes", __name__)
+
+
+@image_bp.route("/get_image/<filename>", methods=["GET"])
+def get_image(filename):
+    try:
+        filename = secure_filename(filename)
+        image_path = os.path.join(UPLOAD_FOLDER, filename)
+
+        # Served without auth, so only files whose names cannot be guessed; legacy timestamp-named uploads look missing
+        if not is_public_image(filename) or not os.path.isfile(image_path):
+            return jsonify({"error": "Image not found", "type": "error"}), 404
+
+        # Content-hashed files are never rewritten and cached for good; the default avatar keeps its name when it is
+        # replaced, so clients revalidate it against its digest instead
+        if is_hashed_image(filename):
+            response = send_file(os.path.abspath(image_path), etag=get_image_digest(image_path), conditional=True, max_age=31536000)
+            response.cache_control.immutable = True
+        else:
+            response = send_file(os.path.abspath(image_path), etag=get_image_digest(image_path), conditional=True, max_age=0)
+            response.cache_control.no_cache = True
+        response.cache_control.public = True
+        return response
+    except Exception as e:
+        return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
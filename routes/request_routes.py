@@ -1,14 +1,15 @@
-import re
-
-from firebase_admin import messaging
 from flask import Blueprint, request, jsonify
 
+from achievements import achievements
+from availability import get_window
+from catalog import catalog
 from config import db
-from db import Message, Course, User, CourseSkill
+from db import Message, User, CourseSkill
+from notifications import queue_notification
+from pagination import get_page, paginate_query
 from routes.auth_wrapper import auth_required
-from utils import string_to_list, get_response_image, get_course_rating, get_course_module, map_messages, \
-    get_tutor_datas, map_archive_messages, string_to_double_list, compute_achievement_progress, list_to_string, \
-    check_completed_achievements
+from utils import get_response_image, get_course_rating, get_course_module, map_messages_list, get_tutor_datas, \
+    map_archive_messages
 
 request_bp = Blueprint("request_routes", __name__)
 
@@ -25,7 +26,7 @@ def get_student(current_user):
                 message.tutor_viewed = True
                 db.session.commit()
 
-            course = Course.query.filter_by(course_id=message.course_id).first()
+            course = catalog.get(message.course_id)
             user = User.query.filter_by(id=message.tutor_id if (current_user["role"] == "STUDENT") else message.student_id).first()
 
             if user.is_banned:
@@ -36,7 +37,7 @@ def get_student(current_user):
                 "studentId": message.student_id,
                 "tutorId": message.tutor_id,
                 "courseName": course.course_name,
-                "moduleName": string_to_list(course.modules)[message.module_id],
+                "moduleName": course.modules[message.module_id],
                 "studentMessage": message.student_message,
                 "userId": user.id,
                 "name": user.name,
@@ -142,12 +143,13 @@ def get_message_notifications(current_user):
         user_id = current_user["id"]
         role = current_user["role"]
         if role == "STUDENT":
-            messages = Message.query.filter_by(student_id=user_id, status="WAITING").all()
+            query = Message.query.filter_by(student_id=user_id, status="WAITING")
         else:
-            messages = Message.query.filter_by(tutor_id=user_id, status="WAITING").all()
+            query = Message.query.filter_by(tutor_id=user_id, status="WAITING")
 
-        response = [*map(lambda x: map_messages(x, role), messages)]
-        return jsonify({"data": response, "type": "success"}), 200
+        messages, next_cursor = paginate_query(query, [Message.message_id], get_page())
+        response = map_messages_list(messages, role)
+        return jsonify({"data": response, "nextCursor": next_cursor, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -159,13 +161,14 @@ def get_tutors(current_user):
         user_id = current_user["id"]
         course_skills = CourseSkill.query.filter_by(user_id=user_id, role="STUDENT").all()
         course_skill_ids = [*map(lambda x: x.course_id, course_skills)]
-        courses = Course.query.all()
+        courses = catalog.all()
+        tutors, next_cursor = get_tutor_datas(course_skill_ids, "", user_id, current_user["primaryLearning"], current_user["secondaryLearning"], get_page(), get_window(), request.args.get("sort") == "recommended")
         response = {
             "studentCourseIds": course_skill_ids,
             "courses": [*map(lambda x: {"id": x.course_id, "name": x.course_name}, courses)],
-            "tutors": get_tutor_datas(course_skill_ids, "", user_id, current_user["primaryLearning"], current_user["secondaryLearning"])
+            "tutors": tutors
         }
-        return jsonify({"data": response, "currentUser": current_user, "type": "success"}), 200
+        return jsonify({"data": response, "nextCursor": next_cursor, "currentUser": current_user, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -175,8 +178,8 @@ def get_tutors(current_user):
 def search_tutor(current_user):
     try:
         filters = request.args.get("course_filter").split(',') if request.args.get("course_filter") else []
-        response = get_tutor_datas([int(x) for x in filters], request.args.get("search_query"), current_user["id"], current_user["primaryLearning"], current_user["secondaryLearning"])
-        return jsonify({"data": response, "type": "success"}), 200
+        response, next_cursor = get_tutor_datas([int(x) for x in filters], request.args.get("search_query"), current_user["id"], current_user["primaryLearning"], current_user["secondaryLearning"], get_page(), get_window(), request.args.get("sort") == "recommended")
+        return jsonify({"data": response, "nextCursor": next_cursor, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -185,13 +188,8 @@ def search_tutor(current_user):
 @auth_required
 def search_message_archives(current_user):
     try:
-        search_query = request.args.get("search_query")
-        messages = map_archive_messages(current_user["role"], current_user["id"], request.args.get("status"))
-        if search_query:
-            response = [*filter(lambda x: re.search(search_query, x["name"], re.IGNORECASE) or re.search(search_query, x["course_name"], re.IGNORECASE), messages)]
-            return jsonify({"data": response, "type": "success"}), 200
-        else:
-            return jsonify({"data": messages, "type": "success"}), 200
+        messages, next_cursor = map_archive_messages(current_user["role"], current_user["id"], request.args.get("status"), request.args.get("search_query"), get_page())
+        return jsonify({"data": messages, "nextCursor": next_cursor, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -211,28 +209,11 @@ def reject_student(current_user):
             tutor.requests_denied = tutor.requests_denied + 1
 
             # Update achievement
-            current_progress_tutor = string_to_double_list(tutor.badge_progress_as_tutor)
-            computed_progress_tutor = compute_achievement_progress(
-                float(tutor.requests_denied),
-                [1, 3, 10],
-                [4, 5, 6],
-                current_progress_tutor
-            )
-            tutor.badge_progress_as_tutor = list_to_string(computed_progress_tutor)
-
-            notification = messaging.Message(
-                data={
-                    "title": "Request Rejected",
-                    "body": f"{tutor.name} rejected your tutoring request."
-                },
-                android=messaging.AndroidConfig(priority="high"),
-                token=student.push_notifications_token
-            )
+            response = achievements.update(tutor, "TUTOR", {"requests_denied": tutor.requests_denied})
 
-            messaging.send(notification)
+            queue_notification(student.push_notifications_token, "Request Rejected", f"{tutor.name} rejected your tutoring request.")
 
             db.session.commit()
-            response = check_completed_achievements(current_progress_tutor, computed_progress_tutor, "TUTOR")
             return jsonify({"data": response, "type": "success"}), 201
         else:
             return jsonify({"error": "Message may be accepted or rejected", "type": "error"}), 500
@@ -267,42 +248,13 @@ def send_tutor_request(current_user):
             tutor.tutor_points = tutor.tutor_points + 0.1
 
             # Update achievement
-            current_progress_student = string_to_double_list(student.badge_progress_as_student)
-            computed_progress_student = compute_achievement_progress(
-                student.student_points,
-                [10, 25, 50, 100, 200],
-                [7, 8, 9, 10, 11],
-                compute_achievement_progress(
-                    float(student.requests_sent),
-                    [1, 5, 10, 20],
-                    [0, 1, 2, 3],
-                    current_progress_student
-                )
-            )
-            student.badge_progress_as_student = list_to_string(computed_progress_student)
-
-            current_progress_tutor = string_to_double_list(tutor.badge_progress_as_tutor)
-            computed_progress_tutor = compute_achievement_progress(
-                tutor.tutor_points,
-                [10, 25, 50, 100, 200],
-                [7, 8, 9, 10, 11],
-                current_progress_tutor
-            )
-            tutor.badge_progress_as_tutor = list_to_string(computed_progress_tutor)
-
-            notification = messaging.Message(
-                data={
-                    "title": "Requesting Tutoring",
-                    "body": f"{student.name} requests tutoring with you."
-                },
-                android=messaging.AndroidConfig(priority="high"),
-                token=tutor.push_notifications_token
-            )
+            response = achievements.update(student, "STUDENT", {"requests_sent": student.requests_sent, "student_points": student.student_points})
+            achievements.update(tutor, "TUTOR", {"tutor_points": tutor.tutor_points})
 
-            messaging.send(notification)
+            queue_notification(tutor.push_notifications_token, "Requesting Tutoring", f"{student.name} requests tutoring with you.")
 
             db.session.commit()
-            return jsonify({"achievements": check_completed_achievements(current_progress_student, computed_progress_student, "STUDENT"), "type": "success"}), 201
+            return jsonify({"achievements": response, "type": "success"}), 201
         else:
             return jsonify({"message": "Tutor can only be message once.", "type": "duplicate"}), 401
     except Exception as e:
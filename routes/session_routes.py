@@ -1,15 +1,16 @@
-import re
 from datetime import datetime, timedelta
 
-from firebase_admin import messaging
 from flask import Blueprint, request, jsonify
 
+from achievements import achievements
+from catalog import catalog
 from config import db
-from db import Session, Course, User, Assignment, Message
+from db import Session, User, Assignment, Message
+from notifications import queue_notification
+from pagination import get_page, paginate_query
 from routes.auth_wrapper import auth_required
-from utils import string_to_list, map_sessions, get_archive_sessions, save_pending_multiple_choice_assessment, \
-    save_pending_identification_assessment, save_pending_true_or_false_assessment, list_to_string, match_date, \
-    string_to_double_list, compute_achievement_progress, check_completed_achievements
+from utils import map_sessions_list, get_archive_sessions, save_pending_multiple_choice_assessment, \
+    save_pending_identification_assessment, save_pending_true_or_false_assessment, list_to_string
 
 session_bp = Blueprint("session_routes", __name__)
 
@@ -26,7 +27,7 @@ def get_session(current_user):
                 session.student_viewed = True
                 db.session.commit()
 
-            course = Course.query.filter_by(course_id=session.course_id).first()
+            course = catalog.get(session.course_id)
             response = {
                 "sessionId": session.session_id,
                 "courseName": course.course_name,
@@ -34,7 +35,7 @@ def get_session(current_user):
                 "tutorName": User.query.filter_by(id=session.tutor_id).first().name,
                 "studentId": session.student_id,
                 "studentName": User.query.filter_by(id=session.student_id).first().name,
-                "moduleName": string_to_list(course.modules)[session.module_id],
+                "moduleName": course.modules[session.module_id],
                 "startTime": session.start_time.strftime("%d/%m/%Y %I:%M %p"),
                 "endTime": session.end_time.strftime("%d/%m/%Y %I:%M %p"),
                 "location": session.location
@@ -73,12 +74,13 @@ def get_session_notifications(current_user):
         user_id = current_user["id"]
         role = current_user["role"]
         if role == "STUDENT":
-            sessions = Session.query.filter_by(student_id=user_id, status="UPCOMING").all()
+            query = Session.query.filter_by(student_id=user_id, status="UPCOMING")
         else:
-            sessions = Session.query.filter_by(tutor_id=user_id, status="UPCOMING").all()
+            query = Session.query.filter_by(tutor_id=user_id, status="UPCOMING")
 
-        response = [*map(map_sessions, sessions)]
-        return jsonify({"data": response, "type": "success"}), 200
+        sessions, next_cursor = paginate_query(query, [Session.session_id], get_page())
+        response = map_sessions_list(sessions)
+        return jsonify({"data": response, "nextCursor": next_cursor, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -87,13 +89,8 @@ def get_session_notifications(current_user):
 @auth_required
 def search_session_archives(current_user):
     try:
-        search_query = request.args.get("search_query")
-        sessions = get_archive_sessions(current_user["role"], current_user["id"], request.args.get("status"))
-        if search_query:
-            response = [*filter(lambda x: re.search(search_query, x["name"], re.IGNORECASE) or re.search(search_query, x["course_name"], re.IGNORECASE) or re.search(search_query, x["location"], re.IGNORECASE) or match_date(datetime.strptime(x["start_time"], "%d/%m/%Y %I:%M %p"), search_query) or match_date(datetime.strptime(x["end_time"], "%d/%m/%Y %I:%M %p"), search_query), sessions)]
-            return jsonify({"data": response, "type": "success"}), 200
-        else:
-            return jsonify({"data": sessions, "type": "success"}), 200
+        sessions, next_cursor = get_archive_sessions(current_user["role"], current_user["id"], request.args.get("status"), request.args.get("search_query"), get_page())
+        return jsonify({"data": sessions, "nextCursor": next_cursor, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -145,62 +142,17 @@ def complete_session_and_create_assignment(current_user):
                 student.number_of_rates_as_student = student.number_of_rates_as_student + 1
 
             # Update achievement
-            current_progress_student = string_to_double_list(student.badge_progress_as_student)
-            computed_progress_student = compute_achievement_progress(
-                student.student_points,
-                [10, 25, 50, 100, 200],
-                [7, 8, 9, 10, 11],
-                compute_achievement_progress(
-                    float(student.sessions_completed_as_student),
-                    [1, 5, 10],
-                    [12, 13, 14],
-                    compute_achievement_progress(
-                        float(student.number_of_rates_as_student),
-                        [1, 5, 10],
-                        [25, 26, 27],
-                        current_progress_student
-                    ) if data["rate"] > 0 else current_progress_student
-                )
-            )
-            student.badge_progress_as_student = list_to_string(computed_progress_student)
-
-            current_progress_tutor = string_to_double_list(tutor.badge_progress_as_tutor)
-            computed_progress_tutor = compute_achievement_progress(
-                tutor.tutor_points,
-                [10, 25, 50, 100, 200],
-                [7, 8, 9, 10, 11],
-                compute_achievement_progress(
-                    float(tutor.sessions_completed_as_tutor),
-                    [1, 5, 10],
-                    [12, 13, 14],
-                    compute_achievement_progress(
-                        float(tutor.assignments_created),
-                        [1, 5, 10],
-                        [19, 20, 21],
-                        compute_achievement_progress(
-                            float(tutor.students_rated),
-                            [1, 5, 10],
-                            [22, 23, 24],
-                            current_progress_tutor
-                        ) if data["rate"] > 0 else current_progress_tutor
-                    )
-                )
-            )
-            tutor.badge_progress_as_tutor = list_to_string(computed_progress_tutor)
-
-            notification = messaging.Message(
-                data={
-                    "title": "Session Completed",
-                    "body": f"{tutor.name} completed the session and made your task."
-                },
-                android=messaging.AndroidConfig(priority="high"),
-                token=student.push_notifications_token
-            )
+            student_metrics = {"student_points": student.student_points, "sessions_completed_as_student": student.sessions_completed_as_student}
+            tutor_metrics = {"tutor_points": tutor.tutor_points, "sessions_completed_as_tutor": tutor.sessions_completed_as_tutor, "assignments_created": tutor.assignments_created}
+            if data["rate"] > 0:
+                student_metrics["number_of_rates_as_student"] = student.number_of_rates_as_student
+                tutor_metrics["students_rated"] = tutor.students_rated
+            achievements.update(student, "STUDENT", student_metrics)
+            response = achievements.update(tutor, "TUTOR", tutor_metrics)
 
-            messaging.send(notification)
+            queue_notification(student.push_notifications_token, "Session Completed", f"{tutor.name} completed the session and made your task.")
 
             db.session.commit()
-            response = check_completed_achievements(current_progress_tutor, computed_progress_tutor, "TUTOR")
             return jsonify({"data": response, "type": "success"}), 201
         else:
             return jsonify({"error": "Session may be completed or cancelled", "type": "error"}), 500
@@ -241,47 +193,12 @@ def create_session(current_user):
             tutor.tutor_points = tutor.tutor_points + 0.2
 
             # Update achievement
-            current_progress_student = string_to_double_list(student.badge_progress_as_student)
-            computed_progress_student = compute_achievement_progress(
-                student.student_points,
-                [10, 25, 50, 100, 200],
-                [7, 8, 9, 10, 11],
-                compute_achievement_progress(
-                    float(student.accepted_requests),
-                    [1, 3, 10],
-                    [4, 5, 6],
-                    current_progress_student
-                )
-            )
-            student.badge_progress_as_student = list_to_string(computed_progress_student)
-
-            current_progress_tutor = string_to_double_list(tutor.badge_progress_as_tutor)
-            computed_progress_tutor = compute_achievement_progress(
-                tutor.tutor_points,
-                [10, 25, 50, 100, 200],
-                [7, 8, 9, 10, 11],
-                compute_achievement_progress(
-                    float(tutor.requests_accepted),
-                    [1, 5, 10, 20],
-                    [0, 1, 2, 3],
-                    current_progress_tutor
-                )
-            )
-            tutor.badge_progress_as_tutor = list_to_string(computed_progress_tutor)
-
-            notification = messaging.Message(
-                data={
-                    "title": "Request Accepted",
-                    "body": f"{tutor.name} accepted your request and created session."
-                },
-                android=messaging.AndroidConfig(priority="high"),
-                token=student.push_notifications_token
-            )
+            achievements.update(student, "STUDENT", {"accepted_requests": student.accepted_requests, "student_points": student.student_points})
+            response = achievements.update(tutor, "TUTOR", {"requests_accepted": tutor.requests_accepted, "tutor_points": tutor.tutor_points})
 
-            messaging.send(notification)
+            queue_notification(student.push_notifications_token, "Request Accepted", f"{tutor.name} accepted your request and created session.")
 
             db.session.commit()
-            response = check_completed_achievements(current_progress_tutor, computed_progress_tutor, "TUTOR")
             return jsonify({"data": response, "type": "success"}), 201
         else:
             return jsonify({"error": "Message may be accepted or rejected", "type": "error"}), 500
@@ -328,26 +245,10 @@ def rate_user(current_user):
             tutor.number_of_rates_as_tutor = tutor.number_of_rates_as_tutor + 1
 
             # Update achievement
-            current_progress_student = string_to_double_list(student.badge_progress_as_student)
-            computed_progress_student = compute_achievement_progress(
-                student.tutors_rated,
-                [1, 5, 10],
-                [22, 23, 24],
-                current_progress_student
-            )
-            student.badge_progress_as_student = list_to_string(computed_progress_student)
-
-            current_progress_tutor = string_to_double_list(tutor.badge_progress_as_tutor)
-            computed_progress_tutor = compute_achievement_progress(
-                tutor.number_of_rates_as_tutor,
-                [1, 5, 10],
-                [25, 26, 27],
-                current_progress_tutor
-            )
-            tutor.badge_progress_as_tutor = list_to_string(computed_progress_tutor)
+            response = achievements.update(student, "STUDENT", {"tutors_rated": student.tutors_rated})
+            achievements.update(tutor, "TUTOR", {"number_of_rates_as_tutor": tutor.number_of_rates_as_tutor})
 
             db.session.commit()
-            response = check_completed_achievements(current_progress_student, computed_progress_student, "STUDENT")
             return jsonify({"data": response, "type": "success"}), 200
         else:
             session.tutor_rate = True
@@ -358,26 +259,10 @@ def rate_user(current_user):
             student.number_of_rates_as_student = student.number_of_rates_as_student + 1
 
             # Update achievement
-            current_progress_student = string_to_double_list(student.badge_progress_as_student)
-            computed_progress_student = compute_achievement_progress(
-                student.number_of_rates_as_student,
-                [1, 5, 10],
-                [25, 26, 27],
-                current_progress_student
-            )
-            student.badge_progress_as_student = list_to_string(computed_progress_student)
-
-            current_progress_tutor = string_to_double_list(tutor.badge_progress_as_tutor)
-            computed_progress_tutor = compute_achievement_progress(
-                tutor.students_rated,
-                [1, 5, 10],
-                [22, 23, 24],
-                current_progress_tutor
-            )
-            tutor.badge_progress_as_tutor = list_to_string(computed_progress_tutor)
+            achievements.update(student, "STUDENT", {"number_of_rates_as_student": student.number_of_rates_as_student})
+            response = achievements.update(tutor, "TUTOR", {"students_rated": tutor.students_rated})
 
             db.session.commit()
-            response = check_completed_achievements(current_progress_tutor, computed_progress_tutor, "TUTOR")
             return jsonify({"data": response, "type": "success"}), 200
     except Exception as e:
         db.session.rollback()
@@ -1,15 +1,16 @@
-import os
-from datetime import datetime
-
 import bcrypt
 from flask import Blueprint, jsonify, request
-from werkzeug.utils import secure_filename
 
-from config import api, UPLOAD_FOLDER, db, SALT
-from db import User, CourseSkill, Achievement
+from achievements import decode_progress
+from catalog import catalog
+from config import db, SALT
+from db import User, CourseSkill
+from leaderboard import leaderboard
 from routes.auth_wrapper import auth_required
-from utils import info_response, string_to_double_list, get_response_image, badge_paths, get_course_rating, \
-    get_courses_only, allowed_file, validate_info, validate_password
+from row_versions import view_etag, not_modified, set_validators
+from utils import info_response, get_response_image, get_badge_atlas, get_course_rating, \
+    get_courses_only, allowed_file, validate_info, validate_password, save_image_variants, image_variant_path, \
+    remove_unused_image, get_image_or_reference
 
 user_bp = Blueprint("user_routes", __name__)
 
@@ -18,8 +19,13 @@ user_bp = Blueprint("user_routes", __name__)
 @auth_required
 def get_info(current_user):
     try:
+        etag = view_etag("get_info", current_user, [current_user["id"]])
+        response = not_modified(etag)
+        if response:
+            return response
+
         user = User.query.filter_by(id=current_user["id"]).first()
-        return jsonify({"data": info_response(user), "type": "success"}), 200
+        return set_validators(jsonify({"data": info_response(user), "type": "success"}), etag), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -29,12 +35,16 @@ def get_info(current_user):
 def get_achievements(current_user):
     try:
         role = current_user["role"]
+        atlas = get_badge_atlas(role)
+        etag = view_etag("get_achievements", current_user, [current_user["id"]], atlas["checksum"])
+        response = not_modified(etag)
+        if response:
+            return response
+
         user = User.query.filter_by(id=current_user["id"]).first()
-        progress = string_to_double_list(user.badge_progress_as_student if (role == "STUDENT") else user.badge_progress_as_tutor)
-        badges = [get_response_image(x) for x in badge_paths(current_user["role"])]
-        icons = badges[1:]
-        achievements = [*map(lambda x: {"title": x[1].title, "description": x[1].description, "progress": progress[x[0]], "icons": icons[x[0]]}, enumerate(Achievement.query.filter_by(role=role).all()))]
-        return jsonify({"data": {"achievements": achievements, "badge": badges[0]}, "currentUser": current_user, "type": "success"}), 200
+        progress = decode_progress(user.badge_progress_as_student if (role == "STUDENT") else user.badge_progress_as_tutor)
+        achievements = [{"title": title, "description": description, "progress": round(progress[idx], 4), "icons": icon} for idx, (title, description, icon) in enumerate(atlas["achievements"])]
+        return set_validators(jsonify({"data": {"achievements": achievements, "badge": atlas["badge"]}, "currentUser": current_user, "type": "success"}), etag), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -45,6 +55,11 @@ def get_analytics(current_user):
     try:
         user_id = current_user["id"]
         role = current_user["role"]
+        etag = view_etag("get_analytics", current_user, [user_id], catalog.get_checksum())
+        response = not_modified(etag)
+        if response:
+            return response
+
         user = User.query.filter_by(id=user_id).first()
         user_courses = CourseSkill.query.filter_by(user_id=user_id, role=role).all()
         user_courses_with_names = [*map(get_course_rating, user_courses)]
@@ -62,11 +77,11 @@ def get_analytics(current_user):
             "assessments": user.assessments_taken_as_student if (role == "STUDENT") else user.assessments_taken_as_tutor,
             "rateNumber": user.number_of_rates_as_student if (role == "STUDENT") else user.number_of_rates_as_tutor,
             "ratedUsers": user.tutors_rated if (role == "STUDENT") else user.students_rated,
-            "badgesCompleted": sum(1 for x in string_to_double_list(user.badge_progress_as_student if (role == "STUDENT") else user.badge_progress_as_tutor) if x >= 100.0),
+            "badgesCompleted": sum(1 for x in decode_progress(user.badge_progress_as_student if (role == "STUDENT") else user.badge_progress_as_tutor) if x >= 100.0),
             "rating": user.total_rating_as_student if (role == "STUDENT") else user.total_rating_as_tutor,
             "courses": user_courses_with_names
         }
-        return jsonify({"data": response, "currentUser": current_user, "type": "success"}), 200
+        return set_validators(jsonify({"data": response, "currentUser": current_user, "type": "success"}), etag), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -87,6 +102,11 @@ def get_dashboard_data(current_user):
     try:
         user_id = current_user["id"]
         role = current_user["role"]
+        etag = view_etag("get_dashboard_data", current_user, [user_id], catalog.get_checksum())
+        response = not_modified(etag)
+        if response:
+            return response
+
         user_courses = [*map(get_course_rating, CourseSkill.query.filter_by(user_id=user_id, role=role).limit(3).all())]
         user = User.query.filter_by(id=user_id).first()
         response = {
@@ -95,7 +115,7 @@ def get_dashboard_data(current_user):
             "courses": user_courses,
             "image": get_response_image(user.image_path)
         }
-        return jsonify({"data": response, "currentUser": current_user, "type": "success"}), 200
+        return set_validators(jsonify({"data": response, "currentUser": current_user, "type": "success"}), etag), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -104,14 +124,10 @@ def get_dashboard_data(current_user):
 @auth_required
 def get_leaderboard(current_user):
     try:
-        if current_user["role"] == "STUDENT":
-            leaderboard = User.query.filter_by(is_banned=False).order_by((User.total_rating_as_student / User.number_of_rates_as_student).desc()).limit(20).all()
-            response = [*map(lambda x: {"id": x.id, "name": x.name, "rating": x.total_rating_as_student, "rateNumber": x.number_of_rates_as_student, "image": get_response_image(x.image_path)}, leaderboard)]
-            return jsonify({"data": response, "currentUser": current_user, "type": "success"}), 200
-        else:
-            leaderboard = User.query.filter_by(is_banned=False).order_by((User.total_rating_as_tutor / User.number_of_rates_as_tutor).desc()).limit(20).all()
-            response = [*map(lambda x: {"id": x.id, "name": x.name, "rating": x.total_rating_as_tutor, "rateNumber": x.number_of_rates_as_tutor, "image": get_response_image(x.image_path)}, leaderboard)]
-            return jsonify({"data": response, "currentUser": current_user, "type": "success"}), 200
+        course_id = request.args.get("course_id", type=int)
+        entries = leaderboard.top(current_user["role"], course_id)
+        response = [*map(lambda x: {"id": x.user_id, "name": x.name, "rating": x.ratings[current_user["role"]][0], "rateNumber": x.ratings[current_user["role"]][1], "image": get_image_or_reference(image_variant_path(x.image_path, "thumbnail"))}, entries)]
+        return jsonify({"data": response, "currentUser": current_user, "type": "success"}), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -121,6 +137,11 @@ def get_leaderboard(current_user):
 def get_profile(current_user):
     try:
         other_id = request.args.get("other_id")
+        etag = view_etag("get_profile", current_user, [current_user["id"], int(other_id)], catalog.get_checksum())
+        response = not_modified(etag)
+        if response:
+            return response
+
         user = User.query.filter_by(id=other_id).first()
 
         if user.is_banned:
@@ -138,7 +159,7 @@ def get_profile(current_user):
             "primaryLearning": user.primary_learning_pattern,
             "secondaryLearning": user.secondary_learning_pattern
         }
-        return jsonify({"data": response, "currentUser": current_user, "type": "success"}), 200
+        return set_validators(jsonify({"data": response, "currentUser": current_user, "type": "success"}), etag), 200
     except Exception as e:
         return jsonify({"error": f"Unhandled exception: {e}", "type": "error"}), 500
 
@@ -163,13 +184,12 @@ def upload_image(current_user):
     if file and allowed_file(file.filename):
         try:
             user = User.query.filter_by(id=current_user["id"]).first()
-            filename = secure_filename(datetime.now().strftime("%d_%m_%Y_%H_%M_%S") + '.' + file.filename.rsplit('.', 1)[1])
-            file.save(os.path.join(api.config['UPLOAD_FOLDER'], filename))
+            image_path = save_image_variants(file)
 
-            if os.path.exists(user.image_path) and user.image_path != "images/user.png":
-                os.remove(user.image_path)
+            if user.image_path != image_path:
+                remove_unused_image(user.image_path, user.id)
 
-            user.image_path = UPLOAD_FOLDER + "/" + filename
+            user.image_path = image_path
             db.session.commit()
             return jsonify({"data": {"message": "Success"}, "type": "success"}), 201
         except Exception as e:
@@ -0,0 +1,60 @@
+import json
+from hashlib import sha1
+
+from flask import request, Response
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as OrmSession
+
+from config import db
+from db import User, CourseSkill
+from negotiation import response_format
+
+# Columns no per-user view shows, writing only these leaves the version alone
+UNVERSIONED_USER_FIELDS = ("password", "push_notifications_token", "row_version")
+
+VERSIONED_USER_FIELDS = tuple(x.key for x in User.__table__.columns if x.key not in UNVERSIONED_USER_FIELDS)
+
+
+def get_row_versions(user_ids):
+    return dict(db.session.query(User.id, User.row_version).filter(User.id.in_(user_ids)).all())
+
+
+def view_etag(view, current_user, user_ids, *extra):
+    # Strong validator of a per-user view: its name, response format, query string, the principal it was rendered for,
+    # the row versions of its users and any other inputs. The principal comes from a per-worker cache that can lag the
+    # row version, so it is hashed as rendered rather than trusted to match it
+    versions = get_row_versions(user_ids)
+    parts = [
+        view, response_format(), request.query_string.decode("utf-8"), json.dumps(current_user, sort_keys=True),
+        *[f"{x}:{versions.get(x)}" for x in user_ids], *map(str, extra)
+    ]
+    return sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def set_validators(response, etag):
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Authorization")
+    response.vary.add("Accept")
+    return response
+
+
+def not_modified(etag):
+    # Empty 304 when the client already holds this representation, otherwise None
+    if request.if_none_match.contains(etag):
+        return set_validators(Response(status=304), etag)
+    return None
+
+
+@event.listens_for(OrmSession, "after_flush")
+def bump_row_versions(session, flush_context):
+    # Bumped in SQL within the same transaction, so concurrent writers never hand out the same version twice
+    user_ids = set()
+    for obj in [*session.new, *session.dirty, *session.deleted]:
+        if isinstance(obj, CourseSkill):
+            user_ids.add(obj.user_id)
+        elif isinstance(obj, User) and obj not in session.deleted and (obj in session.new or any(inspect(obj).attrs[x].history.has_changes() for x in VERSIONED_USER_FIELDS)):
+            user_ids.add(obj.id)
+    if user_ids:
+        table = User.__table__
+        session.connection().execute(table.update().where(table.c.id.in_(user_ids)).values(row_version=table.c.row_version + 1))
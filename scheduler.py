@@ -1,32 +1,168 @@
-from datetime import datetime
+import json
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from threading import Lock
 
-from config import api, scheduler, db
-from db import Message, Session, Assignment
+from sqlalchemy import update, or_
+from sqlalchemy.exc import IntegrityError
+
+from config import api, scheduler, db, SCHEDULER_ENABLED, SCHEDULER_LEASE_TTL, SCHEDULER_HEARTBEAT_SECONDS, PUSH_DISPATCH_SECONDS
+from db import Message, Session, Assignment, SchedulerLease, JobRun
+from notifications import dispatch_notifications
+from tutor_index import tutor_index
+
+LEASE_NAME = "scheduler"
+
+scheduler_state = {"pid": None}
+scheduler_lock = Lock()
+
+# Written by the heartbeat only, jobs read it instead of touching the lease table on every run
+lease_state = {"holder": None, "expires_at": None}
+
+# (model, deadline column, active status, expired status)
+EXPIRY_RULES = [
+    (Message, Message.expire_date, "WAITING", "REJECT"),
+    (Session, Session.expire_date, "UPCOMING", "CANCELLED"),
+    (Assignment, Assignment.dead_line, "UNCOMPLETED", "DEADLINED")
+]
+
+last_expiry_sweep = {}
 
 
 def check_expires():
     with api.app_context():
-        messages = Message.query.all()
-        sessions = Session.query.all()
-        assignments = Assignment.query.all()
+        now = datetime.now()
+        changed = {}
+        tutor_ids = set()
+
+        try:
+            for model, deadline, status, expired_status in EXPIRY_RULES:
+                rows = db.session.execute(
+                    update(model)
+                    .where(model.status == status, deadline < now)
+                    .values(status=expired_status)
+                    .returning(model.tutor_id)
+                    .execution_options(synchronize_session=False)
+                ).all()
+                changed[model.__tablename__] = len(rows)
+                if model is Message:
+                    tutor_ids.update(x.tutor_id for x in rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        # Bulk updates skip the flush events, and expired requests count as rejections in the tutors' acceptance rates
+        if tutor_ids:
+            tutor_index.mark_stale(tutor_ids)
+
+        last_expiry_sweep.update({"ranAt": now, "changed": changed})
+        api.logger.info("check_expires changed %s", changed)
+        return changed
+
+
+def worker_id():
+    # Read on every call, workers forked from a preloaded app must not share their parent's id
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lease():
+    # Renews the lease if this worker holds it, takes it over if the holder stopped heartbeating
+    lease_state.update(holder=None, expires_at=None)
+    now = datetime.now()
+    holder = worker_id()
+    expires_at = now + timedelta(seconds=SCHEDULER_LEASE_TTL)
+    try:
+        result = db.session.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == LEASE_NAME, or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now))
+            .values(holder=holder, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        is_leader = result.rowcount == 1
+        if not is_leader and not db.session.get(SchedulerLease, LEASE_NAME):
+            db.session.add(SchedulerLease(name=LEASE_NAME, holder=holder, expires_at=expires_at))
+            db.session.flush()
+            is_leader = True
+        db.session.commit()
+        if is_leader:
+            lease_state.update(holder=holder, expires_at=expires_at)
+        return is_leader
+    except IntegrityError:
+        # Another worker created the lease row first
+        db.session.rollback()
+        return False
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def heartbeat():
+    with api.app_context():
+        return acquire_lease()
+
+
+def is_leader():
+    # The holder check keeps a process forked from a leader from inheriting its lease
+    expires_at = lease_state["expires_at"]
+    return lease_state["holder"] == worker_id() and expires_at is not None and datetime.now() < expires_at
+
+
+def run_as_leader(job_id, func, record=True):
+    with api.app_context():
+        if not is_leader():
+            return None
+
+        # Frequent jobs skip the job_run bookkeeping, their failures still reach the log
+        if not record:
+            try:
+                return func()
+            except Exception:
+                db.session.rollback()
+                api.logger.exception("Scheduled job %s failed", job_id)
+                return None
+
+        run = JobRun(job_id=job_id, holder=worker_id(), started_at=datetime.now())
+        db.session.add(run)
+        db.session.commit()
+        started = time.perf_counter()
+
+        try:
+            result = func()
+            run.status = "SUCCESS"
+            run.result = json.dumps(result, default=str)
+            return result
+        except Exception as e:
+            db.session.rollback()
+            run.status = "FAILED"
+            run.result = str(e)
+            api.logger.exception("Scheduled job %s failed", job_id)
+        finally:
+            run.finished_at = datetime.now()
+            run.duration = time.perf_counter() - started
+            db.session.commit()
+
 
-        for message in messages:
-            if message.expire_date < datetime.now() and message.status == "WAITING":
-                message.status = "REJECT"
-                db.session.commit()
+def check_expires_job():
+    return run_as_leader("check expires job", check_expires)
 
-        for session in sessions:
-            if session.expire_date < datetime.now() and session.status == "UPCOMING":
-                session.status = "CANCELLED"
-                db.session.commit()
 
-        for assignment in assignments:
-            if assignment.dead_line < datetime.now() and assignment.status == "UNCOMPLETED":
-                assignment.status = "DEADLINED"
-                db.session.commit()
+def dispatch_notifications_job():
+    return run_as_leader("dispatch notifications job", dispatch_notifications, record=False)
 
 
-# Should be removed in deployment and its corresponding imports
 def init_scheduler():
-    scheduler.add_job(func=check_expires, trigger="interval", id="check expires job", hours=2)
-    scheduler.start()
+    # Once per worker process; every worker runs the scheduler and the lease picks the one that does the work
+    if scheduler_state["pid"] == os.getpid() or not SCHEDULER_ENABLED:
+        return
+    with scheduler_lock:
+        if scheduler_state["pid"] == os.getpid():
+            return
+        scheduler_state["pid"] = os.getpid()
+        # First beat right away, no job runs in this worker until it holds the lease
+        scheduler.add_job(func=heartbeat, trigger="interval", id="scheduler heartbeat", seconds=SCHEDULER_HEARTBEAT_SECONDS, next_run_time=datetime.now())
+        scheduler.add_job(func=check_expires_job, trigger="interval", id="check expires job", hours=2)
+        scheduler.add_job(func=dispatch_notifications_job, trigger="interval", id="dispatch notifications job", seconds=PUSH_DISPATCH_SECONDS)
+        scheduler.start()
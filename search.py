@@ -0,0 +1,109 @@
+import re
+from threading import Lock
+
+from sqlalchemy import text, bindparam
+
+from config import db
+from db import User, Course, Session, Assignment
+
+# FTS5 index name -> (model, id column, indexed column); each index is an external-content table kept in sync by triggers
+SEARCH_INDEXES = {
+    "user_search": (User, "id", "name"),
+    "course_search": (Course, "course_id", "course_name"),
+    "session_search": (Session, "session_id", "location"),
+    "assignment_search": (Assignment, "assignment_id", "type")
+}
+
+search_state = {"ready": False, "fts": False}
+search_lock = Lock()
+
+
+def search_tokens(search_query):
+    return re.findall(r"\w+", search_query or "")
+
+
+def fts_supported(connection):
+    if connection.dialect.name != "sqlite":
+        return False
+    options = [x[0] for x in connection.execute(text("PRAGMA compile_options")).all()]
+    return "ENABLE_FTS5" in options
+
+
+def create_search_index(connection, name, model, id_column, column):
+    table = model.__table__.name
+    exists = connection.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}).first()
+    connection.execute(text(f'CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({column}, content="{table}", content_rowid="{id_column}", tokenize="unicode61")'))
+    connection.execute(text(f'''
+        CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON "{table}" BEGIN
+            INSERT INTO {name}(rowid, {column}) VALUES (new.{id_column}, new.{column});
+        END'''))
+    connection.execute(text(f'''
+        CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON "{table}" BEGIN
+            INSERT INTO {name}({name}, rowid, {column}) VALUES ('delete', old.{id_column}, old.{column});
+        END'''))
+    connection.execute(text(f'''
+        CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {column} ON "{table}" BEGIN
+            INSERT INTO {name}({name}, rowid, {column}) VALUES ('delete', old.{id_column}, old.{column});
+            INSERT INTO {name}(rowid, {column}) VALUES (new.{id_column}, new.{column});
+        END'''))
+    if not exists:
+        connection.execute(text(f"INSERT INTO {name}({name}) VALUES ('rebuild')"))
+
+
+def init_search():
+    if search_state["ready"]:
+        return
+    with search_lock:
+        if search_state["ready"]:
+            return
+        with db.engine.begin() as connection:
+            search_state["fts"] = fts_supported(connection)
+            if search_state["fts"]:
+                for name, (model, id_column, column) in SEARCH_INDEXES.items():
+                    create_search_index(connection, name, model, id_column, column)
+        search_state["ready"] = True
+
+
+def search_ranks(name, search_query, ids):
+    # Ranks (lower is better) of the given ids whose indexed column prefix-matches every token of the query
+    tokens = search_tokens(search_query)
+    ids = set(ids)
+    if not tokens or not ids:
+        return {}
+
+    init_search()
+    model, id_column, column = SEARCH_INDEXES[name]
+
+    if search_state["fts"]:
+        match = " ".join(f'"{x}"*' for x in tokens)
+        statement = text(f"SELECT rowid, bm25({name}) FROM {name} WHERE {name} MATCH :match AND rowid IN :ids").bindparams(bindparam("ids", expanding=True))
+        return {row[0]: row[1] for row in db.session.execute(statement, {"match": match, "ids": [*ids]}).all()}
+
+    id_attribute = getattr(model, id_column)
+    query = db.session.query(id_attribute).filter(id_attribute.in_(ids))
+    for token in tokens:
+        query = query.filter(getattr(model, column).ilike(f"%{token}%"))
+    return {row[0]: 0.0 for row in query.all()}
+
+
+def text_matches(value, search_query):
+    # Same prefix semantics as the FTS indexes, for short in-memory strings such as module names
+    tokens = [x.lower() for x in search_tokens(search_query)]
+    words = [x.lower() for x in search_tokens(value)]
+    return bool(tokens) and all(any(word.startswith(token) for word in words) for token in tokens)
+
+
+def date_matches(date_time, search_query):
+    tokens = search_tokens(search_query)
+    parts = [str(date_time.year), str(date_time.month), str(date_time.day)]
+    return bool(tokens) and all(any(part.startswith(token) for part in parts) for token in tokens)
+
+
+def rank_rows(rows, key, *rankers):
+    # (rank, row) pairs for the rows matched by at least one ranker, best match first and ties broken by key
+    ranked = []
+    for row in rows:
+        ranks = [x for x in (ranker(row) for ranker in rankers) if x is not None]
+        if ranks:
+            ranked.append((min(ranks), row))
+    return sorted(ranked, key=lambda x: (x[0], key(x[1])))
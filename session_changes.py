@@ -0,0 +1,86 @@
+import time
+from abc import ABC, abstractmethod
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+
+
+def on_commit(name, collect, apply):
+    # Keys collect(session, obj) returns for flushed objects reach apply only after the commit, so nothing can reload
+    # pre-commit rows under them; a rollback discards them
+    key = f"{name}_changes"
+
+    def collect_changes(session, flush_context):
+        changes = session.info.setdefault(key, set())
+        for obj in [*session.new, *session.dirty, *session.deleted]:
+            changes.update(collect(session, obj))
+
+    def apply_changes(session):
+        changes = session.info.pop(key, None)
+        if changes:
+            apply(changes)
+
+    def discard_changes(session):
+        session.info.pop(key, None)
+
+    event.listen(OrmSession, "after_flush", collect_changes)
+    event.listen(OrmSession, "after_commit", apply_changes)
+    event.listen(OrmSession, "after_rollback", discard_changes)
+
+
+def changed_any(*models):
+    # Collector for caches that are dropped as a whole when any row of the models changes
+    return lambda session, obj: (True,) if isinstance(obj, models) else ()
+
+
+class IncrementalIndex(ABC):
+    # Entries patched for the ids committed writes mark stale. Other workers do not see our writes, so a full rebuild
+    # every ttl seconds bounds their staleness
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.stale = set()
+        self.loaded_at = None
+        self.lock = Lock()
+        self.clear()
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    @abstractmethod
+    def load_entries(self, ids=None):
+        pass
+
+    @abstractmethod
+    def add_entry(self, entry):
+        pass
+
+    @abstractmethod
+    def remove_entry(self, entry_id):
+        pass
+
+    def mark_stale(self, ids):
+        with self.lock:
+            self.stale.update(ids)
+
+    def invalidate(self):
+        with self.lock:
+            self.loaded_at = None
+
+    def refresh(self):
+        with self.lock:
+            if self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl:
+                self.clear()
+                for entry in self.load_entries().values():
+                    self.add_entry(entry)
+                self.stale = set()
+                self.loaded_at = time.monotonic()
+            elif self.stale:
+                ids = self.stale
+                self.stale = set()
+                entries = self.load_entries(ids)
+                for entry_id in ids:
+                    self.remove_entry(entry_id)
+                    if entry_id in entries:
+                        self.add_entry(entries[entry_id])
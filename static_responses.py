@@ -0,0 +1,119 @@
+import random
+from hashlib import sha1
+from threading import Lock
+
+from flask import Response
+
+from catalog import catalog
+from db import LearningPatternAssessment
+from negotiation import MIMETYPES, response_format, dumps, envelope, array
+from row_versions import not_modified, set_validators
+from session_changes import on_commit, changed_any
+from utils import split_choices
+
+
+class StaticResponse:
+    # Payload serialized once per version and response format of its source, keyed by the builder's arguments
+    def __init__(self, build, version=None):
+        self.build = build
+        self.source_version = version
+        self.generation = 0
+        self.payloads = {}
+        self.lock = Lock()
+
+    def version(self):
+        return self.source_version() if self.source_version else self.generation
+
+    def invalidate(self):
+        with self.lock:
+            self.generation = self.generation + 1
+
+    def get(self, *args):
+        # Read the version before building, so a payload is never stored under a newer version than its data. This
+        # holds because versions only move after the change commits
+        version = self.version()
+        payload = self.payloads.get(args)
+        if payload is None or payload[0] != version:
+            obj = self.build(*args)
+            encoded = {x: dumps(obj, x) for x in MIMETYPES}
+            payload = (version, {x: (data, sha1(data).hexdigest()) for x, data in encoded.items()})
+            with self.lock:
+                self.payloads[args] = payload
+        return payload[1]
+
+    def respond(self, current_user, *args):
+        # Same envelope jsonify builds, with the cached body spliced in and a 304 when the client already has it
+        fmt = response_format()
+        data, digest = self.get(*args)[fmt]
+        if current_user:
+            status, (head, tail) = 200, envelope(fmt, [("currentUser", current_user), ("type", "success")])
+        else:
+            status, (head, tail) = 250, envelope(fmt, [("type", "unauthorized")])
+        etag = sha1(digest.encode("utf-8") + head + tail).hexdigest()
+
+        response = not_modified(etag)
+        if response:
+            return response
+        return set_validators(Response(head + data + tail, status=status, mimetype=MIMETYPES[fmt]), etag)
+
+
+def build_courses():
+    return [*map(lambda x: {"id": x.course_id, "name": x.course_name, "description": x.course_description}, catalog.all())]
+
+
+def build_course_name_and_desc(course_id):
+    course = catalog.get(course_id)
+    return {
+        "name": course.course_name,
+        "description": course.course_description
+    }
+
+
+class ShuffledAssessmentResponse:
+    # Questions and choices serialized once per version and put in a fresh random order on every request, so the body
+    # carries no validators
+    def __init__(self):
+        self.generation = 0
+        self.fragments = None
+        self.lock = Lock()
+
+    def invalidate(self):
+        with self.lock:
+            self.generation = self.generation + 1
+
+    def load(self):
+        # Format -> [(bytes around the choices of a question, [serialized choice])]
+        rows = LearningPatternAssessment.query.all()
+        return {
+            fmt: [
+                (envelope(fmt, [("question", x.question)], "choices"), [dumps(split_choices(y), fmt) for y in (x.letter_a, x.letter_b, x.letter_c, x.letter_d)])
+                for x in rows
+            ]
+            for fmt in MIMETYPES
+        }
+
+    def get(self, fmt):
+        generation = self.generation
+        fragments = self.fragments
+        if fragments is None or fragments[0] != generation:
+            fragments = (generation, self.load())
+            with self.lock:
+                self.fragments = fragments
+        return fragments[1][fmt]
+
+    def respond(self, current_user):
+        fmt = response_format()
+        questions = [head + array(fmt, random.sample(choices, len(choices))) + tail for (head, tail), choices in self.get(fmt)]
+        random.shuffle(questions)
+        head, tail = envelope(fmt, [("currentUser", current_user), ("type", "success")])
+        response = Response(head + array(fmt, questions) + tail, status=200, mimetype=MIMETYPES[fmt])
+        response.vary.add("Accept")
+        return response
+
+
+courses_response = StaticResponse(build_courses, catalog.get_version)
+course_name_and_desc_response = StaticResponse(build_course_name_and_desc, catalog.get_version)
+learning_pattern_assessment_response = ShuffledAssessmentResponse()
+
+
+on_commit("learning_pattern", changed_any(LearningPatternAssessment), lambda changes: learning_pattern_assessment_response.invalidate())
@@ -0,0 +1,245 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import inspect, func, case
+
+from availability import parse_free_time, covers
+from config import TUTOR_INDEX_TTL, RECOMMENDATION_WINDOW_DAYS, db
+from db import User, CourseSkill, Message
+from session_changes import on_commit, IncrementalIndex
+
+TutorEntry = namedtuple("TutorEntry", ["tutor_id", "name", "primary_pattern", "secondary_pattern", "is_banned", "availability", "base_score", "courses"])
+
+INDEXED_USER_FIELDS = (
+    "name", "is_banned", "primary_learning_pattern", "secondary_learning_pattern", "free_tutoring_time",
+    "total_rating_as_tutor", "number_of_rates_as_tutor"
+)
+
+# Weights of the 0 to 1 features recommended searches rank tutors by
+RANKING_WEIGHTS = {"courseRating": 0.35, "tutorRating": 0.25, "acceptance": 0.15, "pattern": 0.15, "availability": 0.1}
+# Tutors with few ratings or answered requests are pulled towards 0.5 as if they had this many neutral ones
+RANKING_PRIOR = 2
+
+
+# parse_free_time merges touching intervals, so a week has at most one per day
+AVAILABILITY_INTERVALS = 7
+
+
+def smoothed(total, count):
+    return (total + RANKING_PRIOR * 0.5) / (count + RANKING_PRIOR)
+
+
+def base_score(total_rating, number_of_rates, accepted, answered):
+    # The part of a tutor's score that does not depend on the student, computed once per index load
+    return RANKING_WEIGHTS["tutorRating"] * smoothed(total_rating, number_of_rates) + RANKING_WEIGHTS["acceptance"] * smoothed(accepted, answered)
+
+
+class TutorVectors:
+    # Ranking features of every indexed tutor as aligned arrays, one column per slot; freed slots go to the next tutor
+    def __init__(self, capacity=64):
+        self.free = []
+        self.used = 0
+        self.pattern_ids = {}
+        self.slots = np.full(capacity, -1, dtype=np.int32)
+        self.tutor_ids = np.full(capacity, -1, dtype=np.int64)
+        self.base_scores = np.zeros(capacity)
+        self.primary_patterns = np.full(capacity, -1, dtype=np.int32)
+        self.secondary_patterns = np.full(capacity, -1, dtype=np.int32)
+        # One row per interval, so an availability check is a few contiguous comparisons over every slot
+        self.starts = np.zeros((AVAILABILITY_INTERVALS, capacity), dtype=np.int16)
+        self.ends = np.zeros((AVAILABILITY_INTERVALS, capacity), dtype=np.int16)
+        # Course id -> rating of each slot's tutor and whether the tutor teaches the course at all
+        self.ratings = {}
+        self.teaches = {}
+
+    def grow(self):
+        capacity = len(self.tutor_ids)
+        self.tutor_ids = np.concatenate([self.tutor_ids, np.full(capacity, -1, dtype=np.int64)])
+        self.base_scores = np.concatenate([self.base_scores, np.zeros(capacity)])
+        self.primary_patterns = np.concatenate([self.primary_patterns, np.full(capacity, -1, dtype=np.int32)])
+        self.secondary_patterns = np.concatenate([self.secondary_patterns, np.full(capacity, -1, dtype=np.int32)])
+        self.starts = np.concatenate([self.starts, np.zeros_like(self.starts)], axis=1)
+        self.ends = np.concatenate([self.ends, np.zeros_like(self.ends)], axis=1)
+        for course_id in self.ratings:
+            self.ratings[course_id] = np.concatenate([self.ratings[course_id], np.zeros(capacity)])
+            self.teaches[course_id] = np.concatenate([self.teaches[course_id], np.zeros(capacity, dtype=bool)])
+
+    def set_slot(self, tutor_id, slot):
+        # Tutor id -> slot, indexed by the id itself so a whole candidate list is looked up in one gather
+        if tutor_id >= len(self.slots):
+            self.slots = np.concatenate([self.slots, np.full(max(tutor_id + 1, 2 * len(self.slots)) - len(self.slots), -1, dtype=np.int32)])
+        self.slots[tutor_id] = slot
+
+    def pattern_id(self, pattern):
+        return self.pattern_ids.setdefault(pattern, len(self.pattern_ids))
+
+    def add(self, entry):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.used == len(self.tutor_ids):
+                self.grow()
+            slot = self.used
+            self.used = self.used + 1
+        self.set_slot(entry.tutor_id, slot)
+        self.tutor_ids[slot] = entry.tutor_id
+        self.base_scores[slot] = entry.base_score
+        self.primary_patterns[slot] = self.pattern_id(entry.primary_pattern)
+        self.secondary_patterns[slot] = self.pattern_id(entry.secondary_pattern)
+        # Empty (0, 0) intervals pad the rest, they cover no window
+        self.starts[:, slot] = 0
+        self.ends[:, slot] = 0
+        for i, (start, end) in enumerate(entry.availability):
+            self.starts[i, slot] = start
+            self.ends[i, slot] = end
+        for course_id, rating in entry.courses.items():
+            if course_id not in self.ratings:
+                self.ratings[course_id] = np.zeros(len(self.tutor_ids))
+                self.teaches[course_id] = np.zeros(len(self.tutor_ids), dtype=bool)
+            self.ratings[course_id][slot] = rating
+            self.teaches[course_id][slot] = True
+
+    def remove(self, entry):
+        slot = self.slots[entry.tutor_id]
+        self.slots[entry.tutor_id] = -1
+        self.tutor_ids[slot] = -1
+        for course_id in entry.courses:
+            self.ratings[course_id][slot] = 0
+            self.teaches[course_id][slot] = False
+        self.free.append(slot)
+
+    def rows(self, tutor_ids):
+        tutor_ids = np.fromiter(tutor_ids, dtype=np.int64, count=len(tutor_ids))
+        rows = self.slots[tutor_ids[(tutor_ids >= 0) & (tutor_ids < len(self.slots))]]
+        return rows[rows >= 0]
+
+    def covers(self, window):
+        # Whether each slot's availability covers the window, for every slot at once
+        covered = np.ones(len(self.tutor_ids), dtype=bool)
+        for first, last in window:
+            covered &= ((self.starts <= first) & (last <= self.ends)).any(axis=0)
+        return covered
+
+
+class TutorIndex(IncrementalIndex):
+    # Course id -> tutor ids plus the few tutor attributes needed to filter before loading any User rows
+    def __init__(self):
+        super().__init__(TUTOR_INDEX_TTL)
+
+    def clear(self):
+        self.tutors = {}
+        self.by_course = {}
+        self.vectors = TutorVectors()
+
+    def load_entries(self, user_ids=None):
+        query = db.session.query(
+            CourseSkill.user_id, CourseSkill.course_id, CourseSkill.assessment_rating, CourseSkill.assessment_taken,
+            *[getattr(User, x) for x in INDEXED_USER_FIELDS]
+        ).join(User, User.id == CourseSkill.user_id).filter(CourseSkill.role == "TUTOR")
+        if user_ids is not None:
+            query = query.filter(CourseSkill.user_id.in_(user_ids))
+
+        # Acceptance over requests answered or expired recently, messages have no creation date so expiry stands in for it
+        acceptance = db.session.query(
+            Message.tutor_id, func.sum(case((Message.status == "ACCEPT", 1), else_=0)), func.count()
+        ).filter(Message.status.in_(("ACCEPT", "REJECT")), Message.expire_date > datetime.now() - timedelta(days=RECOMMENDATION_WINDOW_DAYS))
+        if user_ids is not None:
+            acceptance = acceptance.filter(Message.tutor_id.in_(user_ids))
+        acceptance = {x[0]: (x[1], x[2]) for x in acceptance.group_by(Message.tutor_id).all()}
+
+        entries = {}
+        for user_id, course_id, rating, taken, name, is_banned, primary_pattern, secondary_pattern, free_time, total_rating, number_of_rates in query.all():
+            entry = entries.get(user_id)
+            if entry is None:
+                score = base_score(total_rating, number_of_rates, *acceptance.get(user_id, (0, 0)))
+                entry = entries[user_id] = TutorEntry(user_id, name, primary_pattern, secondary_pattern, is_banned, parse_free_time(free_time), score, {})
+            entry.courses[course_id] = (rating / taken) * 5
+        return entries
+
+    def add_entry(self, entry):
+        self.tutors[entry.tutor_id] = entry
+        for course_id in entry.courses:
+            self.by_course.setdefault(course_id, set()).add(entry.tutor_id)
+        self.vectors.add(entry)
+
+    def remove_entry(self, tutor_id):
+        entry = self.tutors.pop(tutor_id, None)
+        if entry:
+            for course_id in entry.courses:
+                self.by_course.get(course_id, set()).discard(tutor_id)
+            self.vectors.remove(entry)
+
+    def search(self, course_filter, user_id, primary_learning, secondary_learning, window=None):
+        self.refresh()
+        with self.lock:
+            candidates = set().union(*[self.by_course.get(x, set()) for x in course_filter])
+            matches = []
+            for tutor_id in sorted(candidates):
+                entry = self.tutors[tutor_id]
+                if tutor_id == user_id or entry.is_banned:
+                    continue
+                if primary_learning != entry.primary_pattern and secondary_learning != entry.secondary_pattern:
+                    continue
+                if window is not None and not covers(entry.availability, window):
+                    continue
+                matches.append((tutor_id, [(x, entry.courses[x]) for x in course_filter if x in entry.courses]))
+            return matches
+
+    def recommend(self, tutor_ids, course_filter, primary_learning, secondary_learning, window, after, size):
+        # (-score, tutor_id) of the best `size` tutors ranked after the `after` key, best first, scored in one array pass
+        with self.lock:
+            vectors = self.vectors
+            rows = vectors.rows(tutor_ids)
+            courses = [x for x in course_filter if x in vectors.ratings]
+            if not len(rows) or not courses:
+                return []
+            # Mean rating over the filtered courses the tutor teaches, every candidate teaches at least one
+            total = sum([vectors.ratings[x][rows] for x in courses])
+            count = sum([vectors.teaches[x][rows].astype(float) for x in courses])
+            primary = vectors.primary_patterns[rows] == vectors.pattern_ids.get(primary_learning, -1)
+            secondary = vectors.secondary_patterns[rows] == vectors.pattern_ids.get(secondary_learning, -1)
+            scores = (
+                vectors.base_scores[rows]
+                + RANKING_WEIGHTS["courseRating"] / 5 * (total / count)
+                + RANKING_WEIGHTS["pattern"] / 2 * (primary.astype(float) + secondary.astype(float))
+                + RANKING_WEIGHTS["availability"] * vectors.covers(window)[rows]
+            )
+            ids = vectors.tutor_ids[rows]
+
+        keys = -scores
+        if after is not None:
+            # Same order as comparing (key, tutor_id) tuples: on a tied key a one-value cursor lets every tutor through
+            tied = keys == after[0]
+            if len(after) > 1:
+                tied &= ids > after[1]
+            mask = (keys > after[0]) | tied
+            keys, ids = keys[mask], ids[mask]
+        if size < len(keys):
+            # Every key tied with the cut competes on tutor id in the sort below
+            cut = keys[np.argpartition(keys, size - 1)[size - 1]]
+            selected = np.flatnonzero(keys <= cut)
+            keys, ids = keys[selected], ids[selected]
+        order = np.lexsort((ids, keys))[:size]
+        return [(float(keys[x]), int(ids[x])) for x in order]
+
+    def is_available(self, tutor_id, window):
+        with self.lock:
+            entry = self.tutors.get(tutor_id)
+            return entry is not None and covers(entry.availability, window)
+
+
+tutor_index = TutorIndex()
+
+
+def collect_tutor_changes(session, obj):
+    if isinstance(obj, CourseSkill):
+        return (obj.user_id,)
+    if isinstance(obj, Message):
+        return (obj.tutor_id,)
+    if isinstance(obj, User) and any(inspect(obj).attrs[x].history.has_changes() for x in INDEXED_USER_FIELDS):
+        return (obj.id,)
+    return ()
+
+
+on_commit("tutor_index", collect_tutor_changes, tutor_index.mark_stale)
@@ -1,18 +1,30 @@
 from datetime import datetime
+import hashlib
 import io
+import os
 import random
 import re
 from base64 import encodebytes
-from itertools import groupby
+from threading import Lock
 
 import bcrypt
-import pytz
-from PIL import Image
+from PIL import Image, ImageOps
+from cachetools import LRUCache
+from flask import has_request_context, request, url_for
 from itsdangerous import URLSafeTimedSerializer
-
-from config import ALLOWED_EXTENSIONS, EMAIL_REGEX, PASSWORD_REGEX, api, SALT
-from db import Achievement, User, CourseSkill, db, Course, Assignment, Session, Message, \
+from sqlalchemy.orm import load_only
+
+from achievements import achievements
+from availability import current_window
+from catalog import catalog
+from config import ALLOWED_EXTENSIONS, EMAIL_REGEX, PASSWORD_REGEX, api, SALT, IMAGE_CACHE_MAX_BYTES, UPLOAD_FOLDER, \
+    IMAGE_VARIANTS, DEFAULT_IMAGE_PATH, RECOMMENDATION_SIZE
+from db import Achievement, User, CourseSkill, db, Assignment, Session, Message, \
     PendingMultipleChoiceAssessment, PendingIdentificationAssessment, PendingTrueOrFalseAssessment, Admin
+from negotiation import EncodedImage
+from pagination import paginate_query, paginate_list, end_page
+from search import search_tokens, search_ranks, text_matches, date_matches, rank_rows
+from tutor_index import tutor_index
 
 
 def list_to_string(lst):
@@ -23,80 +35,35 @@ def string_to_list(string):
     return string.split('|')
 
 
-def string_to_double_list(string):
-    return [*map(lambda x: float(x), string.split(','))]
-
-
 def string_to_int_list(string):
     return [*map(lambda x: int(x), string.split(','))]
 
 
-def compute_achievement_progress(data, achievements_goal, achievements_index, achievement_progress):
-    return [
-        min(100 * (data / achievements_goal[achievements_index.index(idx)]), 100.0)
-        if idx in achievements_index else progress
-        for idx, progress in enumerate(achievement_progress)
-    ]
-
-
-def check_completed_achievements(current_progress, computed_progress, role):
-    return [
-        *map(
-            lambda x: Achievement.query.filter_by(id=x[0] + 1, role=role).first().title,
-            filter(
-                lambda x: x[1] != computed_progress[x[0]] and computed_progress[x[0]] >= 100.0,
-                enumerate(current_progress)
-            )
-        )
-    ]
-
-
 def update_assessment_achievement(eligibility, score, user_id):
     user = User.query.filter_by(id=user_id).first()
     if eligibility:
         user.assessments_taken_as_tutor = user.assessments_taken_as_tutor + 1
         user.tutor_assessment_points = user.tutor_assessment_points + (score * 0.1)
         user.tutor_points = user.tutor_points + (score * 0.1)
-        current_progress_tutor = string_to_double_list(user.badge_progress_as_tutor)
-        computed_progress_tutor = compute_achievement_progress(
-            user.tutor_points,
-            [10, 25, 50, 100, 200],
-            [7, 8, 9, 10, 11],
-            compute_achievement_progress(
-                float(len(CourseSkill.query.filter_by(user_id=user_id, role="TUTOR").all())),
-                [1, 3, 5, 10],
-                [15, 16, 17, 18],
-                current_progress_tutor
-            )
-        )
-        user.badge_progress_as_tutor = list_to_string(computed_progress_tutor)
-
-        db.session.commit()
-        return check_completed_achievements(current_progress_tutor, computed_progress_tutor, "TUTOR")
+        response = achievements.update(user, "TUTOR", {
+            "tutor_points": user.tutor_points,
+            "courses": CourseSkill.query.filter_by(user_id=user_id, role="TUTOR").count()
+        })
     else:
         user.assessments_taken_as_student = user.assessments_taken_as_student + 1
         user.student_assessment_points = user.student_assessment_points + (score * 0.1)
         user.student_points = user.student_points + (score * 0.1)
-        current_progress_student = string_to_double_list(user.badge_progress_as_student)
-        computed_progress_student = compute_achievement_progress(
-            user.student_points,
-            [10, 25, 50, 100, 200],
-            [7, 8, 9, 10, 11],
-            compute_achievement_progress(
-                float(len(CourseSkill.query.filter_by(user_id=user_id, role="STUDENT").all())),
-                [1, 3, 5, 10],
-                [15, 16, 17, 18],
-                current_progress_student
-            )
-        )
-        user.badge_progress_as_student = list_to_string(computed_progress_student)
+        response = achievements.update(user, "STUDENT", {
+            "student_points": user.student_points,
+            "courses": CourseSkill.query.filter_by(user_id=user_id, role="STUDENT").count()
+        })
 
-        db.session.commit()
-        return check_completed_achievements(current_progress_student, computed_progress_student, "STUDENT")
+    db.session.commit()
+    return response
 
 
 def get_course_rating(course_skill):
-    course = Course.query.filter_by(course_id=course_skill.course_id).first()
+    course = catalog.get(course_skill.course_id)
     return {
         "courseName": course.course_name,
         "courseDescription": course.course_description,
@@ -106,7 +73,7 @@ def get_course_rating(course_skill):
 
 
 def get_courses_only(course_skill):
-    course = Course.query.filter_by(course_id=course_skill.course_id).first()
+    course = catalog.get(course_skill.course_id)
     return {
         "name": course.course_name,
         "description": course.course_description
@@ -114,11 +81,11 @@ def get_courses_only(course_skill):
 
 
 def get_course_module(course_skill):
-    course = Course.query.filter_by(course_id=course_skill.course_id).first()
+    course = catalog.get(course_skill.course_id)
     return {
         "courseId": course.course_id,
         "courseName": course.course_name,
-        "modules": string_to_list(course.modules)
+        "modules": [*course.modules]
     }
 
 
@@ -126,10 +93,6 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def match_date(date_time, search_query):
-    return re.search(search_query, str(date_time.year), re.IGNORECASE) or re.search(search_query, str(date_time.month), re.IGNORECASE) or re.search(search_query, str(date_time.day), re.IGNORECASE)
-
-
 def info_response(user):
     return {
         "id": user.id,
@@ -142,7 +105,7 @@ def info_response(user):
         "contactNumber": user.contact_number,
         "summary": user.summary,
         "educationalBackground": user.educational_background,
-        "image": get_response_image(user.image_path),
+        "image": get_image_or_reference(image_variant_path(user.image_path, "medium")),
         "freeTutoringTime": user.free_tutoring_time
     }
 
@@ -222,22 +185,44 @@ def validate_login(user, email, password, is_admin):
     return {"isValid": True, "message": "User Logged In"}
 
 
-def map_messages(message, role):
-    user = User.query.filter_by(id=message.tutor_id if (role == "STUDENT") else message.student_id).first()
+def get_courses_by_id(course_ids):
+    return {x: catalog.get(x) for x in set(course_ids)}
+
+
+def get_users_by_id(user_ids):
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    users = User.query.options(load_only(User.id, User.name, User.image_path)).filter(User.id.in_(user_ids)).all()
+    return {x.id: x for x in users}
+
+
+def other_user_id(row, role):
+    return row.tutor_id if (role == "STUDENT") else row.student_id
+
+
+def map_messages(message, role, users, courses):
+    user = users[other_user_id(message, role)]
     return {
         "messageId": message.message_id,
         "name": user.name,
-        "courseName": Course.query.filter_by(course_id=message.course_id).first().course_name,
+        "courseName": courses[message.course_id].course_name,
         "status": message.status,
         "tutorViewed": message.tutor_viewed,
-        "image": get_response_image(user.image_path)
+        "image": get_image_or_reference(image_variant_path(user.image_path, "thumbnail"))
     }
 
 
-def map_sessions(session):
+def map_messages_list(messages, role):
+    users = get_users_by_id(other_user_id(x, role) for x in messages)
+    courses = get_courses_by_id(x.course_id for x in messages)
+    return [map_messages(x, role, users, courses) for x in messages]
+
+
+def map_sessions(session, courses):
     return {
         "sessionId": session.session_id,
-        "courseName": Course.query.filter_by(course_id=session.course_id).first().course_name,
+        "courseName": courses[session.course_id].course_name,
         "startTime": session.start_time.strftime("%d/%m/%Y %I:%M %p"),
         "endTime": session.end_time.strftime("%d/%m/%Y %I:%M %p"),
         "status": session.status,
@@ -245,12 +230,17 @@ def map_sessions(session):
     }
 
 
-def map_assignments(assignment):
-    course = Course.query.filter_by(course_id=assignment.course_id).first()
+def map_sessions_list(sessions):
+    courses = get_courses_by_id(x.course_id for x in sessions)
+    return [map_sessions(x, courses) for x in sessions]
+
+
+def map_assignments(assignment, courses):
+    course = courses[assignment.course_id]
     return {
         "assignmentId": assignment.assignment_id,
         "courseName": course.course_name,
-        "moduleName": string_to_list(course.modules)[assignment.module_id],
+        "moduleName": course.modules[assignment.module_id],
         "type": assignment.type,
         "deadLine": assignment.dead_line.strftime("%d/%m/%Y %I:%M %p"),
         "status": assignment.status,
@@ -259,6 +249,11 @@ def map_assignments(assignment):
     }
 
 
+def map_assignments_list(assignments):
+    courses = get_courses_by_id(x.course_id for x in assignments)
+    return [map_assignments(x, courses) for x in assignments]
+
+
 def validate_signup(name, email, password, confirm_password, is_admin):
     users = Admin.query.all() if is_admin else User.query.all()
 
@@ -294,37 +289,86 @@ def split_choices(choice):
     return {"choice": x[0], "type": x[1]}
 
 
-def map_archive_messages(role, user_id, status):
+def get_archive_query(model, role, user_id, status):
     if role == "STUDENT":
-        messages = Message.query.filter_by(student_id=user_id, status=status).all()
+        return model.query.filter_by(student_id=user_id, status=status)
     else:
-        messages = Message.query.filter_by(tutor_id=user_id, status=status).all()
-    return [*map(lambda x: map_messages(x, role), messages)]
+        return model.query.filter_by(tutor_id=user_id, status=status)
 
 
-def get_archive_sessions(role, user_id, status):
-    if role == "STUDENT":
-        sessions = Session.query.filter_by(student_id=user_id, status=status).all()
-    else:
-        sessions = Session.query.filter_by(tutor_id=user_id, status=status).all()
-    return [*map(lambda x: map_archive_sessions(role, x), sessions)]
+def paginate_ranked(ranked, key, page):
+    ranked, next_cursor = paginate_list(ranked, lambda x: [x[0], key(x[1])], page)
+    return [x[1] for x in ranked], next_cursor
 
 
-def map_archive_assignments(role, user_id, status):
-    if role == "STUDENT":
-        assignments = Assignment.query.filter_by(student_id=user_id, status=status).all()
+def map_archive_messages(role, user_id, status, search_query=None, page=None):
+    query = get_archive_query(Message, role, user_id, status)
+    if search_tokens(search_query):
+        messages = query.all()
+        user_ranks = search_ranks("user_search", search_query, [other_user_id(x, role) for x in messages])
+        course_ranks = search_ranks("course_search", search_query, [x.course_id for x in messages])
+        ranked = rank_rows(
+            messages,
+            lambda x: x.message_id,
+            lambda x: user_ranks.get(other_user_id(x, role)),
+            lambda x: course_ranks.get(x.course_id)
+        )
+        messages, next_cursor = paginate_ranked(ranked, lambda x: x.message_id, page)
+    else:
+        messages, next_cursor = paginate_query(query, [Message.message_id], page)
+    return map_messages_list(messages, role), next_cursor
+
+
+def get_archive_sessions(role, user_id, status, search_query=None, page=None):
+    query = get_archive_query(Session, role, user_id, status)
+    if search_tokens(search_query):
+        sessions = query.all()
+        user_ranks = search_ranks("user_search", search_query, [other_user_id(x, role) for x in sessions])
+        course_ranks = search_ranks("course_search", search_query, [x.course_id for x in sessions])
+        location_ranks = search_ranks("session_search", search_query, [x.session_id for x in sessions])
+        ranked = rank_rows(
+            sessions,
+            lambda x: x.session_id,
+            lambda x: user_ranks.get(other_user_id(x, role)),
+            lambda x: course_ranks.get(x.course_id),
+            lambda x: location_ranks.get(x.session_id),
+            lambda x: 0.0 if date_matches(x.start_time, search_query) or date_matches(x.end_time, search_query) else None
+        )
+        sessions, next_cursor = paginate_ranked(ranked, lambda x: x.session_id, page)
+    else:
+        sessions, next_cursor = paginate_query(query, [Session.session_id], page)
+    users = get_users_by_id(other_user_id(x, role) for x in sessions)
+    courses = get_courses_by_id(x.course_id for x in sessions)
+    return [map_archive_sessions(role, x, users, courses) for x in sessions], next_cursor
+
+
+def map_archive_assignments(role, user_id, status, search_query=None, page=None):
+    query = get_archive_query(Assignment, role, user_id, status)
+    if search_tokens(search_query):
+        assignments = query.all()
+        course_ranks = search_ranks("course_search", search_query, [x.course_id for x in assignments])
+        type_ranks = search_ranks("assignment_search", search_query, [x.assignment_id for x in assignments])
+        ranked = rank_rows(
+            assignments,
+            lambda x: x.assignment_id,
+            lambda x: course_ranks.get(x.course_id),
+            lambda x: type_ranks.get(x.assignment_id),
+            lambda x: 0.0 if text_matches(catalog.get(x.course_id).modules[x.module_id], search_query) else None,
+            lambda x: 0.0 if date_matches(x.dead_line, search_query) else None
+        )
+        assignments, next_cursor = paginate_ranked(ranked, lambda x: x.assignment_id, page)
     else:
-        assignments = Assignment.query.filter_by(tutor_id=user_id, status=status).all()
-    return [*map(map_assignments, assignments)]
+        assignments, next_cursor = paginate_query(query, [Assignment.assignment_id], page)
+    return map_assignments_list(assignments), next_cursor
 
 
-def map_archive_sessions(role, session):
+def map_archive_sessions(role, session, users, courses):
     return {
         "sessionId": session.session_id,
         "studentId": session.student_id,
         "tutorId": session.tutor_id,
-        "courseName": Course.query.filter_by(course_id=session.course_id).first().course_name,
-        "name": User.query.filter_by(id=session.tutor_id if role == "STUDENT" else session.student_id).first().name,
+        "courseName": courses[session.course_id].course_name,
+        "name": users[other_user_id(session, role)].name,
         "startTime": session.start_time.strftime("%d/%m/%Y %I:%M %p"),
         "endTime": session.end_time.strftime("%d/%m/%Y %I:%M %p"),
         "location": session.location,
@@ -335,65 +379,189 @@ def map_archive_sessions(role, session):
     }
 
 
-def get_tutor_datas(course_filter, search_query, user_id, primary_learning, secondary_learning):
-    course_skills = [*map(lambda x: CourseSkill.query.filter_by(course_id=x, role="TUTOR").all(), course_filter)]
-    flatten_course_skills = sorted([x for cs in course_skills for x in cs], key=lambda x: x.user_id)
-    grouped_course_skills = [map_tutors(k, g) for k, g in groupby(flatten_course_skills, lambda x: x.user_id)]
-    return search_tutors([*filter(lambda x: user_id != x["tutorId"] and not x["isBanned"] and (primary_learning == x["primaryPattern"] or secondary_learning == x["secondaryPattern"]), grouped_course_skills)], search_query)
-
-
-def search_tutors(tutors, search_query):
-    if search_query:
-        return [*filter(lambda x: re.search(search_query, x["tutorName"], re.IGNORECASE) or any(re.search(search_query, y["courseName"], re.IGNORECASE) for y in x["coursesAndRatings"]), tutors)]
+def get_tutor_datas(course_filter, search_query, user_id, primary_learning, secondary_learning, page=None, window=None, recommended=False):
+    matches = tutor_index.search(course_filter, user_id, primary_learning, secondary_learning, window)
+    now = current_window()
+    if search_tokens(search_query):
+        courses = dict(matches)
+        name_ranks = search_ranks("user_search", search_query, courses.keys())
+        course_ranks = search_ranks("course_search", search_query, course_filter)
+        ranked = rank_rows(
+            courses.keys(),
+            lambda x: x,
+            lambda x: name_ranks.get(x),
+            lambda x: min([course_ranks[y] for y, _ in courses[x] if y in course_ranks], default=None)
+        )
+        if recommended:
+            matches = [(x, courses[x]) for _, x in ranked]
+        else:
+            tutor_ids, next_cursor = paginate_ranked(ranked, lambda x: x, page)
+            matches = [(x, courses[x]) for x in tutor_ids]
+    elif not recommended:
+        matches, next_cursor = paginate_list(matches, lambda x: [x[0]], page)
+    if recommended:
+        matches, next_cursor = recommend_tutors(matches, course_filter, primary_learning, secondary_learning, now, page)
+    if not matches:
+        return [], next_cursor
+    users = {x.id: x for x in User.query.filter(User.id.in_([x[0] for x in matches])).all()}
+    return [map_tutors(users[tutor_id], courses, tutor_index.is_available(tutor_id, now)) for tutor_id, courses in matches], next_cursor
+
+
+def recommend_tutors(matches, course_filter, primary_learning, secondary_learning, window, page):
+    # Best RECOMMENDATION_SIZE matches, or the next page of them, by the tutor index's recommendation score
+    courses = dict(matches)
+    if page is None:
+        keys = tutor_index.recommend(courses.keys(), course_filter, primary_learning, secondary_learning, window, None, RECOMMENDATION_SIZE)
+        next_cursor = None
     else:
-        return tutors
+        after = tuple(page["after"]) if page["after"] is not None else None
+        keys = tutor_index.recommend(courses.keys(), course_filter, primary_learning, secondary_learning, window, after, page["size"] + 1)
+        keys, next_cursor = end_page(keys, page, lambda x: [*x])
+    return [(x[1], courses[x[1]]) for x in keys], next_cursor
 
 
-def map_tutors(user_id, course_skills):
-    user = User.query.filter_by(id=user_id).first()
+def map_tutors(user, courses, is_available):
     response = {
-        "tutorId": user_id,
+        "tutorId": user.id,
         "tutorName": user.name,
-        "coursesAndRatings": [{"courseName": Course.query.filter_by(course_id=x.course_id).first().course_name, "courseRating": (x.assessment_rating / x.assessment_taken) * 5} for x in course_skills],
+        "coursesAndRatings": [{"courseName": catalog.get(course_id).course_name, "courseRating": rating} for course_id, rating in courses],
         "performance": {"rating": user.total_rating_as_tutor, "rateNumber": user.number_of_rates_as_tutor},
         "primaryPattern": user.primary_learning_pattern,
         "secondaryPattern": user.secondary_learning_pattern,
-        "isAvailable": get_tutor_availability(user.free_tutoring_time),
-        "image": get_response_image(user.image_path),
+        "isAvailable": is_available,
+        "image": get_image_or_reference(image_variant_path(user.image_path, "thumbnail")),
         "isBanned": user.is_banned
     }
     return response
 
 
-def get_tutor_availability(time_str):
-    time_list = time_str.split("|")
-    for idx, time_pair in enumerate(time_list):
-        time = time_pair.split(",")
-        if datetime.now(pytz.timezone("Asia/Shanghai")).isoweekday() - 1 == idx and get_date(time[0]) < datetime.now(pytz.timezone("Asia/Shanghai")).timestamp() < get_date(time[1]):
-            return True
-
-    return False
-
-
-def get_date(time_str):
-    current_date = datetime.now(pytz.timezone("Asia/Shanghai"))
-    return datetime.strptime(time_str, "%I:%M %p").replace(year=current_date.year, month=current_date.month, day=current_date.day).timestamp()
-
-
 def validate_tutoring_dates(time_str):
     weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
     time = [x.split(",") for x in time_str.split("|")]
     return [weekdays[x[0]] for x in enumerate(time) if datetime.strptime(x[1][0], "%I:%M %p") > datetime.strptime(x[1][1], "%I:%M %p")]
 
 
-def get_response_image(image_path):
+# Encoded images keyed by (path, mtime, size), bounded by the total length of the cached strings
+image_cache = LRUCache(maxsize=IMAGE_CACHE_MAX_BYTES, getsizeof=len)
+image_cache_lock = Lock()
+image_cache_stats = {"hits": 0, "misses": 0}
+
+
+def encode_image(image_path):
     pil_img = Image.open(image_path, mode='r')
     byte_arr = io.BytesIO()
     pil_img.save(byte_arr, format='PNG')
-    encoded_img = encodebytes(byte_arr.getvalue()).decode('ascii')
+    encoded_img = EncodedImage(encodebytes(byte_arr.getvalue()).decode('ascii'))
+    return encoded_img
+
+
+def get_response_image(image_path):
+    stat = os.stat(image_path)
+    key = (image_path, stat.st_mtime_ns, stat.st_size)
+
+    with image_cache_lock:
+        encoded_img = image_cache.get(key)
+        if encoded_img is not None:
+            image_cache_stats["hits"] = image_cache_stats["hits"] + 1
+            return encoded_img
+        image_cache_stats["misses"] = image_cache_stats["misses"] + 1
+
+    encoded_img = encode_image(image_path)
+
+    with image_cache_lock:
+        try:
+            image_cache[key] = encoded_img
+        except ValueError:
+            # Larger than the whole cache, serve it uncached
+            pass
     return encoded_img
 
 
+def save_image_variants(file):
+    data = file.read()
+    digest = hashlib.sha256(data).hexdigest()
+    pil_img = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    pil_img = pil_img.convert("RGBA" if pil_img.mode in ("RGBA", "LA", "P") else "RGB")
+    # Dropping info leaves EXIF, ICC profiles and text chunks out of the saved variants
+    pil_img.info = {}
+
+    for variant, size in IMAGE_VARIANTS.items():
+        variant_img = pil_img.copy()
+        variant_img.thumbnail((size, size))
+        variant_img.save(os.path.join(UPLOAD_FOLDER, f"{digest}_{variant}.png"), format='PNG', optimize=True)
+
+    return f"{UPLOAD_FOLDER}/{digest}_medium.png"
+
+
+def image_variant_path(image_path, variant):
+    base, separator, suffix = image_path.rpartition("_")
+    if separator and suffix.rsplit(".", 1)[0] in IMAGE_VARIANTS:
+        return f"{base}_{variant}.png"
+    # Images uploaded before variants existed only have the original file
+    return image_path
+
+
+def remove_unused_image(image_path, user_id):
+    if image_path == DEFAULT_IMAGE_PATH or User.query.filter(User.image_path == image_path, User.id != user_id).first():
+        return
+
+    for path in {image_variant_path(image_path, x) for x in IMAGE_VARIANTS}:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+image_digests = LRUCache(maxsize=4096)
+
+
+def get_image_digest(image_path):
+    stat = os.stat(image_path)
+    key = (image_path, stat.st_mtime_ns, stat.st_size)
+
+    with image_cache_lock:
+        digest = image_digests.get(key)
+    if digest is None:
+        with open(image_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with image_cache_lock:
+            image_digests[key] = digest
+    return digest
+
+
+# Uploads named by the sha256 of their content, unguessable unlike the timestamp names of legacy uploads
+HASHED_IMAGE_NAME = re.compile(rf"[0-9a-f]{{64}}_({'|'.join(IMAGE_VARIANTS)})\.png")
+
+
+def is_hashed_image(filename):
+    return HASHED_IMAGE_NAME.fullmatch(filename) is not None
+
+
+def is_public_image(filename):
+    return filename == os.path.basename(DEFAULT_IMAGE_PATH) or is_hashed_image(filename)
+
+
+def get_image_reference(image_path):
+    return url_for("image_routes.get_image", filename=os.path.basename(image_path))
+
+
+def get_image_or_reference(image_path):
+    # Clients opt in with ?image_mode=reference and fetch each image once from image_routes
+    # Only hashed uploads are served by reference, legacy ones stay inline behind the caller's auth
+    if has_request_context() and request.args.get("image_mode") == "reference" and is_public_image(os.path.basename(image_path)):
+        return get_image_reference(image_path)
+    return get_response_image(image_path)
+
+
+def get_image_cache_stats():
+    with image_cache_lock:
+        return {
+            "hits": image_cache_stats["hits"],
+            "misses": image_cache_stats["misses"],
+            "entries": len(image_cache),
+            "currentBytes": image_cache.currsize,
+            "maxBytes": image_cache.maxsize
+        }
+
+
 def badge_paths(role):
     if role == "STUDENT":
         return [
@@ -461,6 +629,30 @@ def badge_paths(role):
         ]
 
 
+def load_badge_images():
+    encoded = {x: encode_image(x) for x in set(badge_paths("STUDENT") + badge_paths("TUTOR"))}
+    return {role: tuple(encoded[x] for x in badge_paths(role)) for role in ("STUDENT", "TUTOR")}
+
+
+# Badge icons never change at runtime, so they are encoded once when the module is loaded
+badge_images = load_badge_images()
+
+
+def build_badge_atlas(role):
+    icons = badge_images[role]
+    rows = Achievement.query.filter_by(role=role).all()
+    atlas = {
+        "badge": icons[0],
+        "achievements": tuple((x.title, x.description, icon) for x, icon in zip(rows, icons[1:]))
+    }
+    atlas["checksum"] = hashlib.sha1(repr((atlas["badge"], atlas["achievements"])).encode("utf-8")).hexdigest()
+    return atlas
+
+
+def get_badge_atlas(role):
+    return achievements.get_atlas(role, build_badge_atlas)
+
+
 def generate_token(email):
     serializer = URLSafeTimedSerializer(api.config['SECRET_KEY'])
     return serializer.dumps(email, salt=SALT)
@@ -476,17 +668,21 @@ def validate_token(token, expiration=3600):
         return None
 
 
-def map_assessments(pending_assessment):
-    course = Course.query.filter_by(course_id=pending_assessment.course_id).first()
+def map_assessments(pending_assessment, courses):
     return {
         "assessmentId": pending_assessment.assessment_id,
         "courseId": pending_assessment.course_id,
-        "courseName": course.course_name,
+        "courseName": courses[pending_assessment.course_id].course_name,
         "module": pending_assessment.module,
         "creator": pending_assessment.creator
     }
 
 
+def map_assessments_list(pending_assessments):
+    courses = get_courses_by_id(x.course_id for x in pending_assessments)
+    return [map_assessments(x, courses) for x in pending_assessments]
+
+
 def save_pending_multiple_choice_assessment(data, course_id):
     multiple_choice = PendingMultipleChoiceAssessment(
         course_id=course_id,
@@ -573,7 +769,7 @@ def map_search_user_admin(user):
         "contactNumber": user.contact_number,
         "summary": user.summary,
         "educationalBackground": user.educational_background,
-        "image": get_response_image(user.image_path),
+        "image": get_response_image(image_variant_path(user.image_path, "thumbnail")),
         "freeTutoringTime": user.free_tutoring_time,
         "isBanned": user.is_banned
     }
@@ -587,7 +783,7 @@ def map_chats(key, group):
         "userName": user.name,
         "userRole": user.role,
         "userEmail": user.email,
-        "userImage": get_response_image(user.image_path)
+        "userImage": get_image_or_reference(image_variant_path(user.image_path, "thumbnail"))
     }
 
 